@@ -57,6 +57,17 @@ def get_parser():
     # This will do the subsystem match before the run
     # run.add_argument("--subsystem-dir", help="directory with subsystem metadata to load")
     run.add_argument("-t", "--transform", help="transformer to use", default="flux")
+    run.add_argument(
+        "--workers",
+        help="submit up to this many independent steps at once (defaults to one at a time)",
+        type=int,
+    )
+    run.add_argument(
+        "--coalesce",
+        help="combine tasks that are the same (or differ only by an index variable) into one submit",
+        default=False,
+        action="store_true",
+    )
 
     # This does just the user space subsystem match
     satisfy = subparsers.add_parser(
@@ -67,6 +78,16 @@ def get_parser():
     satisfy.add_argument(
         "--subsystem-dir", dest="sdir", help="subsystem directory with JGF to load"
     )
+    satisfy.add_argument(
+        "--backend",
+        help="subsystem registry backend (sqlite or an in-memory graph)",
+        choices=["sqlite", "graph"],
+        default="sqlite",
+    )
+    satisfy.add_argument(
+        "--database",
+        help="sqlite database file to keep loaded subsystems in (only changed files are loaded)",
+    )
 
     # If this is True, we do not allow a satisfy to occur if subsystem metadata is entirely missing
     # and the jobspec declares it needed
@@ -78,8 +99,25 @@ def get_parser():
         action="store_true",
     )
 
+    satisfy.add_argument(
+        "--json",
+        dest="json",
+        help="print a json result (one line) per jobspec.",
+        default=False,
+        action="store_true",
+    )
+
     for cmd in [run, satisfy]:
-        cmd.add_argument("jobspec", help="jobspec yaml file", default="jobspec.yaml")
+        cmd.add_argument(
+            "--cache",
+            help="cache parsed and validated jobspecs in ~/.compspec/cache",
+            default=False,
+            action="store_true",
+        )
+    run.add_argument("jobspec", help="jobspec yaml file", default="jobspec.yaml")
+    satisfy.add_argument(
+        "jobspec", help="one or more jobspec files or directories with jobspecs", nargs="+"
+    )
 
     return parser
 
@@ -9,15 +9,19 @@ def main(args, _):
     Run an extraction. This can be converted to a proper function
     if needed.
     """
+    from jobspec.core.cache import get_cache
     from jobspec.plugin import get_transformer_registry
 
     registry = get_transformer_registry()
+    cache = get_cache() if args.cache else None
 
     # This raises an error if not found
     # This would be what we put in a Python script
     # that is in a cronjob, for loop receiver, etc.
     # We can add additional options to the init here
-    plugin = registry.get_plugin(args.transform)()
+    plugin = registry.get_plugin(args.transform)(
+        cache=cache, workers=args.workers, coalesce=args.coalesce
+    )
 
     # The jobspec needs to exist as a file here
     if not os.path.exists(args.jobspec):
@@ -1,15 +1,62 @@
 #!/usr/bin/env python
 
+import json
+import os
 import sys
 
+import jobspec.utils as utils
+from jobspec.core.cache import get_cache
+from jobspec.logger import LogColors, logger
 from jobspec.subsystem import get_subsystem_registry
 
 
+def find_jobspecs(paths):
+    """
+    Find jobspec files, looking in directories for yaml.
+
+    Directories are not searched for json, since subsystem (JGF) files are
+    often kept alongside jobspecs. A json jobspec can be given directly.
+    """
+    jobspecs = []
+    for path in paths:
+        if not os.path.exists(path):
+            sys.exit(f"JobSpec {path} does not exist.")
+        if os.path.isdir(path):
+            jobspecs += sorted(utils.recursive_find(path, "[.](yaml|yml)$"))
+        else:
+            jobspecs.append(path)
+    return jobspecs
+
+
 def main(args, _):
     """
-    Determine if a jobspec can be satsified by local resources.
+    Determine if one or more jobspecs can be satsified by local resources.
     This is a fairly simple (flat) check.
     """
-    registry = get_subsystem_registry(args.sdir)
-    is_satisfied = registry.satisfied(args.jobspec, ignore_missing=not args.require_all)
-    sys.exit(0 if is_satisfied else -1)
+    # Check that all jobspecs exist before we load anything
+    jobspecs = find_jobspecs(args.jobspec)
+    registry = get_subsystem_registry(args.sdir, database=args.database, backend=args.backend)
+    cache = get_cache() if args.cache else None
+
+    # The registry is loaded once for all jobspecs
+    all_satisfied = True
+    results = registry.satisfied_many(jobspecs, ignore_missing=not args.require_all, cache=cache)
+    for result in results:
+        all_satisfied = all_satisfied and result["satisfied"]
+        if args.json:
+            print(json.dumps(result, default=str))
+        elif "error" in result:
+            print(
+                f"{LogColors.OKBLUE}{result['jobspec']}{LogColors.ENDC} {LogColors.RED}ERROR{LogColors.ENDC} {result['error']}"
+            )
+        elif not result["satisfied"]:
+            unsatisfied = result["unsatisfied"]
+            print(
+                f"{LogColors.OKBLUE}{result['name']}{LogColors.ENDC} {LogColors.RED}NOT OK{LogColors.ENDC} {unsatisfied['group']}: {unsatisfied['item']}"
+            )
+        else:
+            print(
+                f"{LogColors.OKBLUE}{result['name']}{LogColors.ENDC} {LogColors.OKGREEN}OK{LogColors.ENDC}"
+            )
+    logger.debug(f"Requirement memo: {registry.memo_stats()}")
+    sys.exit(0 if all_satisfied else -1)
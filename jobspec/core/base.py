@@ -1,3 +1,4 @@
+import collections.abc
 import json
 import os
 
@@ -6,24 +7,49 @@ import yaml
 import jobspec.utils as utils
 
 
+def flatten_layers(data):
+    """
+    Turn layered data (a ChainMap) into a dict, including nested layers.
+    """
+    if not isinstance(data, collections.abc.Mapping):
+        return data
+    return {key: flatten_layers(value) for key, value in data.items()}
+
+
 class ResourceBase:
-    def __init__(self, data):
+    # Many of these are created when parsing large jobspecs
+    __slots__ = ("data", "filename", "shared")
+
+    def __init__(self, data, shared=False):
         """
         Interact with loaded resources.
+
+        If shared is True, the data belongs to someone else (e.g., a parent
+        group) and updates are layered on top of it, so it is never copied
+        or changed. Writes to shared data go to a top layer that we own.
         """
         self.data = data or {}
+        self.shared = shared
+        if shared:
+            self.data = collections.ChainMap({}, self.data)
+
+    def to_dict(self):
+        """
+        Return the data as a plain dict, flattening any layers.
+        """
+        return flatten_layers(self.data)
 
     def to_str(self):
         """
         Convert to string
         """
-        return json.dumps(self.data)
+        return json.dumps(self.to_dict())
 
     def to_yaml(self):
         """
         Dump to yaml string
         """
-        return yaml.dump(self.data)
+        return yaml.dump(self.to_dict())
 
     def get(self, name, default=None):
         """
@@ -38,8 +64,22 @@ class ResourceBase:
         Update with new key value pairs
         """
         if not attrs:
+            return self
+        self.layer(attrs)
+        return self
+
+    def layer(self, attrs):
+        """
+        Add new key value pairs, as a layer on top if the data is shared.
+
+        The new values are usually from the jobspec, so they go under the
+        top layer (that we own), and a write can never change them.
+        """
+        if not getattr(self, "shared", False):
+            self.data.update(attrs)
             return
-        self.data.update(attrs)
+        owned, *maps = self.data.maps
+        self.data = collections.ChainMap(owned, attrs, *maps)
 
     def load(self, filename):
         """
@@ -48,21 +88,14 @@ class ResourceBase:
         # Case 1: given a raw filename
         if isinstance(filename, str) and os.path.exists(filename):
             self.filename = os.path.abspath(filename)
-
-            try:
-                self.data = utils.read_json(self.filename)
-            except:
-                self.data = utils.read_yaml(self.filename)
+            self.data = utils.read_structured(self.filename)
 
         # Case 2: jobspec as dict (that we just want to validate)
         elif isinstance(filename, dict):
             self.data = filename
         # Case 3: jobspec as string for json or yaml
         else:
-            try:
-                self.data = json.loads(filename)
-            except:
-                self.data = yaml.load(filename, Loader=yaml.SafeLoader)
+            self.data = utils.load_structured(filename)
 
         # Case 4: wtf are you giving me? :X
         if not self.data:
@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+from jobspec.version import __version__
+
+# Schema digests are computed once per schema
+digests = {}
+
+
+def get_cache(path=None, max_size=None):
+    """
+    If a path is not defined, we cache in the user home at:
+
+    ~/.compspec/cache
+    """
+    if path is None:
+        path = os.path.join(os.path.expanduser("~"), ".compspec", "cache")
+    return JobspecCache(path, max_size=max_size)
+
+
+def get_schema_digest(schema):
+    """
+    Get a digest for a schema, which is part of every cache key.
+
+    We include the library version so a release that changes how
+    jobspecs are parsed also invalidates the cache.
+    """
+    cached = digests.get(id(schema))
+    if cached is not None and cached[0] is schema:
+        return cached[1]
+    content = __version__ + json.dumps(schema, sort_keys=True)
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    digests[id(schema)] = (schema, digest)
+    return digest
+
+
+class JobspecCache:
+    """
+    An on-disk cache of parsed and validated jobspecs.
+
+    Entries are keyed by a hash of the jobspec content and the schema, so
+    a change to either is a miss. When the cache is larger than max_size
+    (bytes) the least recently used entries are removed.
+    """
+
+    def __init__(self, path, max_size=None):
+        self.path = path
+        self.max_size = max_size or 100 * 1024 * 1024
+        os.makedirs(self.path, exist_ok=True)
+
+    def get_filename(self, content, schema):
+        """
+        Get the cache filename for jobspec content (a string) and a schema.
+        """
+        hasher = hashlib.sha256(get_schema_digest(schema).encode("utf-8"))
+        hasher.update(content.encode("utf-8"))
+        return os.path.join(self.path, hasher.hexdigest() + ".pkl")
+
+    def get(self, content, schema):
+        """
+        Get cached data for jobspec content, or None if we don't have it.
+        """
+        filename = self.get_filename(content, schema)
+        try:
+            with open(filename, "rb") as fd:
+                data = pickle.load(fd)
+
+            # The modified time is used to decide what to evict
+            os.utime(filename)
+
+        # A missing or broken entry is just a miss
+        except Exception:
+            return
+        return data
+
+    def set(self, content, schema, data):
+        """
+        Save data for jobspec content, and prune the cache if needed.
+        """
+        filename = self.get_filename(content, schema)
+
+        # Write to a temporary file first so a reader never sees a partial entry
+        fd, tmpfile = tempfile.mkstemp(dir=self.path, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                pickle.dump(data, handle, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmpfile, filename)
+        finally:
+            if os.path.exists(tmpfile):
+                os.remove(tmpfile)
+        self.prune()
+
+    def prune(self):
+        """
+        Remove least recently used entries until we are under the max size.
+        """
+        entries = []
+        total = 0
+        for entry in os.scandir(self.path):
+            if not entry.name.endswith(".pkl"):
+                continue
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            total += st.st_size
+            entries.append((st.st_mtime, st.st_size, entry.path))
+
+        if total <= self.max_size:
+            return
+        for _, size, filename in sorted(entries):
+            try:
+                os.remove(filename)
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= self.max_size:
+                break
+
+    def clear(self):
+        """
+        Remove all entries from the cache.
+        """
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".pkl"):
+                os.remove(entry.path)
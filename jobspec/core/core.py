@@ -1,18 +1,61 @@
-import copy
+import collections.abc
+import concurrent.futures
+import os
 
 import jsonschema
 
 import jobspec.schema as schema
+import jobspec.utils as utils
 from jobspec.logger.generate import generate_name
 
 from .base import ResourceBase
 from .resources import find_resources, to_jobspec
 
+# Validators are compiled once per schema and shared by the process
+validators = {}
+
+
+def get_validator(schema):
+    """
+    Get a compiled validator for a schema, building it on first use.
+
+    Checking the schema against the metaschema and creating the validator
+    is the expensive part of jsonschema.validate, so we only do it once.
+    The schema is kept with the validator so the id cannot be reused.
+    """
+    cached = validators.get(id(schema))
+    if cached is not None and cached[0] is schema:
+        return cached[1]
+    cls = jsonschema.validators.validator_for(schema)
+    cls.check_schema(schema)
+    validator = cls(schema)
+    validators[id(schema)] = (schema, validator)
+    return validator
+
+
+def load_jobspec(cls, item, validate=True):
+    """
+    Load one jobspec for a batch, returning the error instead of raising.
+
+    This needs to be importable at the module level to run in a worker.
+    Not all errors can be pickled (e.g., a jsonschema ValidationError)
+    so we send back a ValueError with the message.
+    """
+    try:
+        return cls(item, validate=validate), None
+    except Exception as e:
+        return None, ValueError(getattr(e, "message", None) or str(e))
+
 
 class Jobspec(ResourceBase):
-    def __init__(self, filename, validate=True, name=None, schema=schema.jobspec_nextgen):
+    def __init__(
+        self, filename, validate=True, name=None, schema=schema.jobspec_nextgen, cache=None
+    ):
         """
         Load in and validate a Jobspec
+
+        If a cache (JobspecCache) is provided, a jobspec file that was
+        already parsed and validated is loaded from it.
         """
         self.name = name or generate_name()
 
@@ -20,15 +63,60 @@ class Jobspec(ResourceBase):
         if not hasattr(self, "schema") or not self.schema:
             self.schema = schema
         self.data = None
+        if cache is not None and isinstance(filename, str) and os.path.exists(filename):
+            self.load_cached(filename, cache, validate)
+            return
         self.load(filename)
         if validate:
             self.validate()
 
+    def load_cached(self, filename, cache, validate=True):
+        """
+        Load a jobspec file from the cache, parsing and saving it on a miss.
+        """
+        content = utils.read_file(filename)
+        self.data = cache.get(content, self.schema)
+        if self.data is None:
+            self.load(content)
+
+            # We only save jobspecs that are known to be valid
+            if validate:
+                self.validate()
+                cache.set(content, self.schema, self.data)
+        self.filename = os.path.abspath(filename)
+
+    @classmethod
+    def load_many(cls, items, workers=None, validate=True):
+        """
+        Load and validate many jobspecs (filenames, strings, or dicts) in a process pool.
+
+        This is a generator that yields (item, jobspec, error) as each one completes,
+        so results are not in the order given. A jobspec that cannot be loaded
+        has jobspec set to None and the exception as the error, and the batch
+        continues.
+        """
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(load_jobspec, cls, item, validate): item for item in items}
+            for future in concurrent.futures.as_completed(futures):
+                item = futures[future]
+                try:
+                    jobspec, error = future.result()
+
+                # E.g., the error or jobspec could not be sent back from the worker
+                except Exception as e:
+                    jobspec, error = None, e
+                yield item, jobspec, error
+
     def validate(self):
         """
         Validate the jsonschema
         """
-        jsonschema.validate(self.data, self.schema)
+        validator = get_validator(self.schema)
+
+        # This mirrors jsonschema.validate, raising the most relevant error
+        error = jsonschema.exceptions.best_match(validator.iter_errors(self.data))
+        if error is not None:
+            raise error
 
         # Require at least one of command or steps, unless it is a group
         for task in self.data.get("tasks", []):
@@ -37,18 +125,27 @@ class Jobspec(ResourceBase):
 
 
 class Resources(ResourceBase):
+    __slots__ = ("slot", "flat")
+
     def __init__(self, data, slot=None):
         """
         Interact with loaded resources.
         """
         self.data = data
         self.slot = slot
+        self.flat = None
 
     def flatten_slot(self, slot=None):
         """
         Find the task slot, flatten it, and return
+
+        The result for our own slot is saved, so the tree is only walked once.
         """
-        slot = slot or self.slot
+        if slot is None or slot == self.slot:
+            if self.flat is None:
+                self.flat = {}
+                find_resources(self.flat, self.data, self.slot)
+            return self.flat
 
         # Traverse each section. There is usually only one I guess
         flat = {}
@@ -64,11 +161,8 @@ class Resources(ResourceBase):
         slot = self.slot or {}
         label = slot_name or (slot.get("label") or "default")
 
-        # Hold onto the original data so it is not mangled
-        js = copy.deepcopy(self.data)
-
         # Traverse each section and convert to flux jobspec
-        has_slot = to_jobspec(js, slot_name=label)
+        js, has_slot = to_jobspec(self.data, slot_name=label)
 
         # If we don't have a slot, we have to make a fake one at the top
         if not has_slot:
@@ -81,7 +175,7 @@ class Attributes(ResourceBase):
     Job attributes, not formally defined yet.
     """
 
-    pass
+    __slots__ = ()
 
 
 class Requires(ResourceBase):
@@ -89,6 +183,8 @@ class Requires(ResourceBase):
     Requires are nested groups
     """
 
+    __slots__ = ()
+
     def update(self, requires):
         """
         Update specific groups. This is assumed
@@ -111,14 +207,22 @@ class Requires(ResourceBase):
             fieldA: valueA
             fieldB: valueC
         """
-        if not requires:
-            return
+        # A string is a reference to a named group, which we already inherit
+        if not requires or isinstance(requires, str):
+            return self
+        updated = {}
         for group, fields in requires.items():
             # If we don't have the group at all, we can add all and continue!
             if group not in self.data:
-                self.data[group] = fields
+                updated[group] = fields
                 continue
 
-            # If we have the group, update on the level of fields
-            self.data[group].update(fields)
+            # If we have the group, update on the level of fields. The fields
+            # are a layer on the group we have (under one we own for writes),
+            # so neither is changed.
+            if isinstance(fields, dict) and isinstance(self.data[group], collections.abc.Mapping):
+                updated[group] = collections.ChainMap({}, fields, self.data[group])
+            else:
+                updated[group] = fields
+        self.layer(updated)
         return self
@@ -1,77 +1,82 @@
-import copy
-
-
 def find_resources(flat, resource, slot, last_one=False):
     """
     Unwrap a nested resource
+
+    We walk the tree with an explicit stack (and not recursion) so deeply
+    nested resources don't hit the recursion limit. Children are pushed in
+    reverse so they are visited in order, and a later count wins.
     """
-    # We found a dominant subsystem resource
-    # TODO convert flux submit into a jobspec too?
-    if "type" in resource and resource["type"] != "slot":
-        if "count" not in resource and "replicas" not in resource:
-            raise ValueError("A resource must have a count (non-slot) or replicas (slot)")
-        flat[resource["type"]] = resource.get("count") or resource.get("replicas")
-
-    # The previous was the found slot, return
-    if last_one:
-        return True
-
-    # We found the slot, this is where we stop
-    if "type" in resource and resource["type"] == "slot":
-        last_one = True
-
-    # More traversing...
-    if "with" in resource:
-        for r in resource["with"]:
-            find_resources(flat, r, slot, last_one)
+    stack = [(resource, last_one)]
+    while stack:
+        resource, last_one = stack.pop()
+
+        # We found a dominant subsystem resource
+        # TODO convert flux submit into a jobspec too?
+        if "type" in resource and resource["type"] != "slot":
+            if "count" not in resource and "replicas" not in resource:
+                raise ValueError("A resource must have a count (non-slot) or replicas (slot)")
+            flat[resource["type"]] = resource.get("count") or resource.get("replicas")
+
+        # The previous was the found slot, stop here
+        if last_one:
+            continue
+
+        # We found the slot, this is where we stop
+        if "type" in resource and resource["type"] == "slot":
+            last_one = True
+
+        # More traversing...
+        for r in reversed(resource.get("with") or []):
+            stack.append((r, last_one))
     return flat
 
 
-def to_jobspec(resource, js=None, slot_name=None, has_slot=False):
+def to_jobspec(resource, slot_name=None):
     """
-    Recursive function to help convert to jobspec
+    Convert a resource to jobspec, returning (jobspec, has_slot)
 
-    There could be more than one slot in the future, but in
+    The resource is not changed. Each resource we visit is copied (without
+    the fields flux does not understand) as we go, so we never need a deep
+    copy up front. There could be more than one slot in the future, but in
     practice now most flux jobspecs just support one.
     """
     slot_name = slot_name or "default"
+    has_slot = False
+
+    js = {}
+    stack = [(resource, js)]
+    while stack:
+        resource, new = stack.pop()
+
+        # Delete requires and replicas, they aren't understood
+        new.update({k: v for k, v in resource.items() if k not in ["requires", "replicas", "with"]})
+
+        # If count not in resources, assume 1
+        if "count" not in new:
+            new["count"] = 1
 
-    # If we don't have flat yet, make it the entire thing
-    if not js:
-        js = copy.deepcopy(resource)
-    else:
-        if "with" not in js:
-            js["with"] = []
-
-    # We found a place to insert a slot
-    if "replicas" in resource:
-        has_slot = True
-        if "replicas" not in resource:
-            raise ValueError("A resource must have a count (non-slot) or replicas (slot)")
-
-        # If we have a slot, expand out into one
-        count = resource["replicas"]
         with_list = resource.get("with") or []
-        slot = {"type": "slot", "count": count, "label": slot_name}
-        if with_list:
-            slot["with"] = with_list
-            resource["with"] = [slot]
-
-    # If count not in resources, assume 1
-    if "count" not in resource:
-        resource["count"] = 1
-
-    # Delete requires, it isn't understood
-    if "requires" in resource:
-        del resource["requires"]
-    if "replicas" in resource:
-        del resource["replicas"]
-
-    # More traversing...
-    if "with" in resource:
-        for r in resource["with"]:
-            has_slot = to_jobspec(r, js, slot_name, has_slot)
-    return has_slot
+        children = new
+        if "with" in resource:
+            new["with"] = []
+
+        # We found a place to insert a slot
+        if "replicas" in resource:
+            has_slot = True
+
+            # If we have a slot, expand out into one
+            if with_list:
+                slot = {"type": "slot", "count": resource["replicas"], "label": slot_name}
+                slot["with"] = []
+                new["with"].append(slot)
+                children = slot
+
+        # More traversing...
+        for r in with_list:
+            child = {}
+            children["with"].append(child)
+            stack.append((r, child))
+    return js, has_slot
 
 
 def parse_resource_subset(named_resources, resources):
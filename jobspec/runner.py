@@ -1,3 +1,5 @@
+import concurrent.futures
+
 # This imports the latest version
 import jobspec.core as js
 import jobspec.steps.runner as step_runner
@@ -14,6 +16,15 @@ class TransformerBase:
 
     steps = {}
 
+    # A JobspecCache to load jobspecs from, if provided as an option
+    cache = None
+
+    # Keyword arguments given to each step run
+    step_options = None
+
+    # Run up to this many independent steps at once (None is one at a time)
+    workers = None
+
     def __init__(self, **options):
         """
         Create a new transformer backend, accepting any options type.
@@ -62,10 +73,53 @@ class TransformerBase:
         # These will depend on the transformer logic
         steps = self.parse(jobspec)
         self.announce()
+        self.run_steps(steps)
 
-        # Run each step to submit the job, and that's it.
+    def run_steps(self, steps):
+        """
+        Run each step to submit the job, and that's it.
+        """
+        if self.workers and self.workers > 1:
+            return self.run_concurrent(steps)
         for step in steps:
-            step_runner.run(self.name, step)
+            step_runner.run(self.name, step, **(self.step_options or {}))
+
+    def run_concurrent(self, steps):
+        """
+        Run steps with up to self.workers running at once.
+
+        Results are printed as steps finish. A step that depends on an
+        earlier step (by name) is not started until that step is done.
+        """
+        options = self.step_options or {}
+
+        def run_step(step, depends_on):
+            # Don't run if a step we depend on failed
+            for future in depends_on:
+                if future.exception() is not None:
+                    return
+            step_runner.run_concurrent(self.name, step, **options)
+
+        # Steps are started in order, so a step we wait for is always running
+        # (or done) before we are, and we can't block the pool.
+        named = {}
+        futures = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for step in steps:
+                depends_on = [named[name] for name in step.after if name in named]
+                future = executor.submit(run_step, step, depends_on)
+                futures.append(future)
+                name = step.options.get("name")
+                if name is not None:
+                    named[name] = future
+
+            # An error in any step ends the run, and we don't start the rest
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    future.result()
+                except BaseException:
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    raise
 
     def load_jobspec(self, filename):
         """
@@ -74,4 +128,4 @@ class TransformerBase:
         This function should be able to load it in some raw format
         and convert into correct directives given the transformer.
         """
-        return js.Jobspec(filename)
+        return js.Jobspec(filename, cache=self.cache)
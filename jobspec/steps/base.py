@@ -25,6 +25,21 @@ class StepBase:
         self.validate()
         self.setup(**kwargs)
 
+    @property
+    def depends_on(self):
+        """
+        Names of steps this step depends on.
+        """
+        task = self.options.get("task") or {}
+        return self.options.get("depends_on") or task.get("depends_on") or []
+
+    @property
+    def after(self):
+        """
+        Names of steps that must be submitted before this step.
+        """
+        return self.depends_on
+
     def _validate(self):
         """
         Shared validation functions
@@ -0,0 +1,44 @@
+import heapq
+
+
+def sort_steps(steps):
+    """
+    Order steps so each comes after the steps it must follow (by name).
+
+    Steps keep their order unless a dependency needs them to move, and a
+    dependency cycle is an error. Names that are not a step here (e.g., a
+    job submit outside of the jobspec) are ignored.
+    """
+    names = {}
+    for i, step in enumerate(steps):
+        name = step.options.get("name")
+        if name is not None:
+            names.setdefault(name, []).append(i)
+
+    # For each step, the steps that wait for it, and how many it waits for
+    waiting = [[] for _ in steps]
+    count = [0] * len(steps)
+    for i, step in enumerate(steps):
+        for name in step.after:
+            for j in names.get(name, []):
+                if j == i:
+                    raise ValueError(f"Step {name} cannot depend on itself.")
+                waiting[j].append(i)
+                count[i] += 1
+
+    # Always take the first step (in the original order) that is ready
+    ready = [i for i, n in enumerate(count) if n == 0]
+    heapq.heapify(ready)
+    ordered = []
+    while ready:
+        i = heapq.heappop(ready)
+        ordered.append(steps[i])
+        for j in waiting[i]:
+            count[j] -= 1
+            if count[j] == 0:
+                heapq.heappush(ready, j)
+
+    if len(ordered) != len(steps):
+        cycle = [steps[i].options.get("name") for i, n in enumerate(count) if n > 0]
+        raise ValueError(f"Steps have a dependency cycle: {', '.join(map(str, cycle))}")
+    return ordered
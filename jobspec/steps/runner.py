@@ -1,16 +1,26 @@
 import sys
+import threading
 
 from jobspec.logger import LogColors
 
+# Steps that run at the same time print one at a time
+lock = threading.Lock()
 
-def run(name, step):
+
+def get_prefix(name, step):
+    prefix = f"{name} {step.name}".ljust(15)
+    return f"=> {LogColors.OKCYAN}{prefix}{LogColors.ENDC}"
+
+
+def run(name, step, **kwargs):
     """
     Run a single step. Make it pretty.
+
+    Any keyword arguments are passed on to the step run.
     """
-    prefix = f"{name} {step.name}".ljust(15)
-    print(f"=> {LogColors.OKCYAN}{prefix}{LogColors.ENDC}", end="")
+    print(get_prefix(name, step), end="")
     try:
-        result = step.run()
+        result = step.run(**kwargs)
         if not result:
             return
         print(
@@ -20,3 +30,41 @@ def run(name, step):
     except Exception as e:
         print(f"\n{LogColors.RED}{str(e)}{LogColors.ENDC}")
         sys.exit()
+
+
+def run_concurrent(name, step, **kwargs):
+    """
+    Run a single step that can be running alongside others.
+
+    Nothing is printed until the step is done, and then it is printed
+    all at once, so output from steps is not mixed.
+    """
+    try:
+        result = step.run(**kwargs)
+    except Exception as e:
+        show_error(name, step, e)
+    show(name, step, result)
+
+
+def show(name, step, result):
+    """
+    Print the result of a step that has already run.
+    """
+    prefix = get_prefix(name, step)
+    with lock:
+        if not result:
+            print(prefix)
+            return
+        print(
+            f"{prefix}{LogColors.OKBLUE}{result.out}{LogColors.ENDC} {LogColors.OKGREEN}OK{LogColors.ENDC}"
+        )
+        result.print_extra()
+
+
+def show_error(name, step, error):
+    """
+    Print an error for a step that has already run, and exit.
+    """
+    with lock:
+        print(f"{get_prefix(name, step)}\n{LogColors.RED}{str(error)}{LogColors.ENDC}")
+    sys.exit()
@@ -1,13 +1,20 @@
 import os
 
+from .graph import GraphRegistry
 from .subsystem import SubsystemRegistry
 
+# Registry backends that can answer satisfy requests
+backends = {"sqlite": SubsystemRegistry, "graph": GraphRegistry}
 
-def get_subsystem_registry(path=None):
+
+def get_subsystem_registry(path=None, database=None, backend="sqlite", workers=None):
     """
     If a path is not defined, we look in the user home at:
 
     ~/.compspec/subsystems
+
+    If a database path is defined, the registry is kept on disk there.
+    Workers is the number of processes to parse subsystem files with.
     """
     if path is None:
         path = os.path.join(os.path.expanduser("~"), ".compspec", "subsystems")
@@ -15,5 +22,8 @@ def get_subsystem_registry(path=None):
     if not os.path.exists(path):
         raise ValueError(f"User subsystem directory {path} does not exist")
 
+    if backend not in backends:
+        raise ValueError(f"Subsystem backend {backend} is not known.")
+
     # Generate the subsystem registry
-    return SubsystemRegistry(path)
+    return backends[backend](path, database=database, workers=workers)
@@ -0,0 +1,170 @@
+import bisect
+from array import array
+from contextlib import contextmanager
+
+from jobspec.logger import logger
+
+from .subsystem import SubsystemRegistry
+
+
+class GraphRegistry(SubsystemRegistry):
+    """
+    A subsystem registry that keeps an index of the graphs in memory.
+
+    Each node is given an integer id, and we keep hash maps from
+    (subsystem, type) and (attribute, value) to arrays of node ids, along
+    with arrays of child ids for edges. Node ids are given in order, so
+    every array is sorted. Unlike the sqlite registry, edges are kept, so
+    we can ask about containment.
+    """
+
+    def setup(self):
+        """
+        Prepare empty indexes.
+        """
+        if self.database is not None:
+            raise ValueError("The graph registry is in memory and does not support a database.")
+
+        # Node id to (subsystem, label), and back
+        self.labels = []
+        self.ids = {}
+
+        # (subsystem, type) and (attribute, value) to node ids
+        self.types = {}
+        self.attributes = {}
+
+        # Node id to child node ids
+        self.children = {}
+        self.subsystems = set()
+
+    def close(self):
+        pass
+
+    @contextmanager
+    def bulk_load(self):
+        """
+        There is nothing to tune for an in memory index.
+        """
+        yield
+
+    def load_subsystem(self, subsystem):
+        """
+        Add a subsystem to the index.
+        """
+        logger.debug(f"Loading subsystem {subsystem.name}")
+        self.memo.clear()
+        if subsystem.name in self.subsystems:
+            raise ValueError(f"Subsystem {subsystem.name} is already loaded.")
+        self.subsystems.add(subsystem.name)
+
+        for label, node in subsystem.iter_nodes():
+            nid = len(self.labels)
+            self.labels.append((subsystem.name, label))
+            self.ids[(subsystem.name, label)] = nid
+
+            key = (subsystem.name, node["metadata"]["type"])
+            self.types.setdefault(key, array("q")).append(nid)
+
+            # Values are always compared as strings
+            for name, value in node["metadata"].get("attributes", {}).items():
+                self.attributes.setdefault((name, str(value)), array("q")).append(nid)
+
+        # Edges reference nodes by label, within the subsystem
+        for edge in subsystem.iter_edges():
+            source = self.ids.get((subsystem.name, edge["source"]))
+            target = self.ids.get((subsystem.name, edge["target"]))
+            if source is None or target is None:
+                logger.warning(f"Edge {edge} in {subsystem.name} references an unknown node.")
+                continue
+            self.children.setdefault(source, array("q")).append(target)
+
+    def remove_subsystem(self, name):
+        """
+        Remove a subsystem and its nodes from the index.
+
+        Node ids are not given again, so the label for a removed node is
+        cleared, and arrays that remain stay sorted.
+        """
+        self.memo.clear()
+        self.subsystems.discard(name)
+        removed = set()
+        for nid, key in enumerate(self.labels):
+            if key is not None and key[0] == name:
+                removed.add(nid)
+                self.labels[nid] = None
+                del self.ids[key]
+        if not removed:
+            return
+
+        for key in [x for x in self.types if x[0] == name]:
+            del self.types[key]
+
+        # Edges are within a subsystem, so we only need to remove the source
+        for nid in removed:
+            self.children.pop(nid, None)
+
+        for key, nids in list(self.attributes.items()):
+            kept = array("q", (nid for nid in nids if nid not in removed))
+            if not kept:
+                del self.attributes[key]
+            elif len(kept) != len(nids):
+                self.attributes[key] = kept
+
+    def has_subsystem(self, name):
+        """
+        Determine if a subsystem is loaded.
+        """
+        return name in self.subsystems
+
+    def has_node_type(self, subsys, typ):
+        """
+        Determine if a subsystem has any nodes of a type.
+        """
+        return (subsys, typ) in self.types
+
+    def has_attribute(self, attribute, value):
+        """
+        Determine if any node has an attribute with a value.
+        """
+        return (attribute, value) in self.attributes
+
+    def has_node_attribute(self, subsys, typ, attribute, value):
+        """
+        Determine if a subsystem has a node of a type with an attribute value.
+
+        We walk the smaller of the two (sorted) arrays and search the larger.
+        """
+        typed = self.types.get((subsys, typ))
+        valued = self.attributes.get((attribute, value))
+        if not typed or not valued:
+            return False
+        if len(typed) > len(valued):
+            typed, valued = valued, typed
+        for nid in typed:
+            i = bisect.bisect_left(valued, nid)
+            if i < len(valued) and valued[i] == nid:
+                return True
+        return False
+
+    def descendants(self, subsys, label):
+        """
+        Yield (subsystem, label) for nodes under a node, following edges.
+        """
+        start = self.ids.get((subsys, label))
+        if start is None:
+            raise ValueError(f"Node {label} is not known in subsystem {subsys}.")
+        seen = {start}
+        stack = [start]
+        while stack:
+            for nid in self.children.get(stack.pop(), ()):
+                if nid in seen:
+                    continue
+                seen.add(nid)
+                stack.append(nid)
+                yield self.labels[nid]
+
+    def contains(self, subsys, parent, child):
+        """
+        Determine if a node (child label) is under another node (parent label).
+        """
+        return (subsys, child) in self.descendants(subsys, parent)
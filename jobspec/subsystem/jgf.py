@@ -0,0 +1,188 @@
+import json
+
+whitespace = " \t\n\r"
+
+# Characters that can follow a complete number
+delimiters = whitespace + ",]}"
+
+
+class JGFReader:
+    """
+    Read nodes and edges from a JGF (json graph format) file incrementally.
+
+    A subsystem graph from a large export can be many GB, and loading it with
+    json.load builds the entire tree before we use any of it. Here we walk the
+    top level structure ourselves, and only decode one node or edge at a time,
+    so memory is bounded by the largest single node (and the read size).
+    Each call to iter_nodes or iter_edges reads the file again.
+    """
+
+    def __init__(self, filename, chunk_size=1024 * 1024):
+        self.filename = filename
+        self.chunk_size = chunk_size
+
+    def iter_nodes(self):
+        """
+        Yield (label, node) for each node in the graph.
+        """
+        with open(self.filename, "r") as fd:
+            stream = JSONStream(fd, self.chunk_size)
+            if not stream.find_graph_section("nodes"):
+                return
+            if stream.peek() != "{":
+                raise ValueError(f"Nodes in {self.filename} must be an object keyed by label.")
+            for label in stream.iter_object():
+                yield label, stream.decode()
+
+    def iter_edges(self):
+        """
+        Yield each edge in the graph.
+        """
+        with open(self.filename, "r") as fd:
+            stream = JSONStream(fd, self.chunk_size)
+            if not stream.find_graph_section("edges"):
+                return
+            if stream.peek() != "[":
+                raise ValueError(f"Edges in {self.filename} must be a list.")
+            for _ in stream.iter_array():
+                yield stream.decode()
+
+
+class JSONStream:
+    """
+    A minimal pull parser over a json file, read in chunks.
+
+    Containers are walked one member at a time, and values are decoded
+    with the standard library decoder once they are fully in the buffer.
+    """
+
+    def __init__(self, fd, chunk_size):
+        self.fd = fd
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """
+        Read the next chunk, dropping what we have already parsed.
+        """
+        chunk = self.fd.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+
+    def peek(self):
+        """
+        Return the next non-whitespace character (None at the end).
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in whitespace:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if self.eof:
+                return
+            self.fill()
+
+    def expect(self, char):
+        """
+        Consume a structural character, or error if it is not next.
+        """
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Invalid json, expected '{char}' and found '{found}'")
+        self.pos += 1
+
+    def decode(self):
+        """
+        Decode the next value.
+
+        If the value runs to the end of the buffer we read more, both when
+        it is incomplete (an error) and when it might be (a number). A number
+        is only complete when it is followed by whitespace or a delimiter,
+        otherwise it could be cut before its fraction or exponent.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                if self.eof or (end < len(self.buffer) and self.is_complete(value, end)):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+    def is_complete(self, value, end):
+        """
+        Determine if a decoded value ending before the end of the buffer is complete.
+        """
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return True
+        return self.buffer[end] in delimiters
+
+    def skip(self):
+        """
+        Skip the next value, walking containers so they are never held at once.
+        """
+        char = self.peek()
+        if char == "{":
+            for _ in self.iter_object():
+                self.skip()
+        elif char == "[":
+            for _ in self.iter_array():
+                self.skip()
+        else:
+            self.decode()
+
+    def iter_object(self):
+        """
+        Yield each key of an object. The caller must consume the value.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.decode()
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("}")
+            return
+
+    def iter_array(self):
+        """
+        Yield for each item of an array. The caller must consume the item.
+        """
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("]")
+            return
+
+    def find_graph_section(self, name):
+        """
+        Move to the value of graph.<name>, returning False if there isn't one.
+        """
+        for key in self.iter_object():
+            if key != "graph":
+                self.skip()
+                continue
+            for section in self.iter_object():
+                if section == name:
+                    return True
+                self.skip()
+        return False
@@ -1,9 +1,9 @@
 create_subsystem_sql = """
-CREATE TABLE subsystems (
+CREATE TABLE IF NOT EXISTS subsystems (
   name TEXT PRIMARY KEY NOT NULL
 );"""
 
-create_nodes_sql = """CREATE TABLE nodes (
+create_nodes_sql = """CREATE TABLE IF NOT EXISTS nodes (
   subsystem TEXT NOT NULL,
   label TEXT NOT NULL,
   type TEXT NOT NULL,
@@ -14,9 +14,54 @@ create_nodes_sql = """CREATE TABLE nodes (
   UNIQUE (subsystem, label)
 );"""
 
-create_attributes_sql = """CREATE TABLE attributes (
+create_attributes_sql = """CREATE TABLE IF NOT EXISTS attributes (
+  subsystem TEXT NOT NULL,
   name TEXT NOT NULL,
   value TEXT NOT NULL,
   node TEXT NOT NULL,
-  FOREIGN KEY(node) REFERENCES nodes(label)
+  FOREIGN KEY(subsystem, node) REFERENCES nodes(subsystem, label)
+);"""
+
+# Indexes for how we look up nodes and attributes. Note that subsystems
+# does not need one - the name is the primary key, which is indexed.
+create_nodes_type_index_sql = """CREATE INDEX IF NOT EXISTS nodes_subsystem_type
+ON nodes (subsystem, type);"""
+
+create_attributes_value_index_sql = """CREATE INDEX IF NOT EXISTS attributes_name_value
+ON attributes (name, value, subsystem, node);"""
+
+create_attributes_node_index_sql = """CREATE INDEX IF NOT EXISTS attributes_subsystem_node
+ON attributes (subsystem, node);"""
+
+# Subsystem files loaded into a persistent database, to know what changed
+create_files_sql = """CREATE TABLE IF NOT EXISTS files (
+  path TEXT PRIMARY KEY NOT NULL,
+  subsystem TEXT NOT NULL,
+  mtime REAL NOT NULL,
+  size INTEGER NOT NULL,
+  digest TEXT NOT NULL
+);"""
+
+insert_subsystem_sql = "INSERT INTO subsystems (name) VALUES (?);"
+
+insert_node_sql = """INSERT INTO nodes (subsystem, label, type, basename, name, id)
+VALUES (?, ?, ?, ?, ?, ?);"""
+
+insert_attribute_sql = "INSERT INTO attributes (subsystem, node, name, value) VALUES (?, ?, ?, ?);"
+
+# Each requirement is answered by one of these (yes or no) queries
+subsystem_exists_sql = "SELECT EXISTS (SELECT 1 FROM subsystems WHERE name = ?);"
+
+node_type_exists_sql = """SELECT EXISTS (
+  SELECT 1 FROM nodes WHERE subsystem = ? AND type = ?
+);"""
+
+attribute_exists_sql = """SELECT EXISTS (
+  SELECT 1 FROM attributes WHERE name = ? AND value = ?
+);"""
+
+node_attribute_exists_sql = """SELECT EXISTS (
+  SELECT 1 FROM nodes JOIN attributes
+    ON attributes.subsystem = nodes.subsystem AND attributes.node = nodes.label
+  WHERE nodes.subsystem = ? AND nodes.type = ? AND attributes.name = ? AND attributes.value = ?
 );"""
@@ -1,29 +1,65 @@
+import concurrent.futures
+import json
 import os
 import sqlite3
+from contextlib import contextmanager
 
 import jobspec.core as core
 import jobspec.subsystem.queries as queries
 import jobspec.utils as utils
 from jobspec.logger import LogColors, logger
 
+from .jgf import JGFReader
+
 
 class SubsystemRegistry:
     """
     A subsystem registry has (and loads) one or more subsystems.
 
     Right now we use an in memory sqlite database since it's
-    efficient.
+    efficient. If a database path is provided, the database is kept
+    on disk and only subsystem files that changed are loaded again.
     """
 
-    def __init__(self, path):
+    # Subsystem files larger than this (bytes) are streamed
+    stream_size = 64 * 1024 * 1024
+
+    # Nodes to insert at once
+    insert_size = 10000
+
+    # Subsystem files are parsed in parallel if there is at least this much (bytes)
+    parallel_size = 8 * 1024 * 1024
+
+    def __init__(self, path, database=None, workers=None):
         self.systems = {}
-        self.conn = sqlite3.connect(":memory:")
-        self.create_tables()
+        self.database = database
+        self.workers = workers
+
+        # Results for requirement items, cleared when subsystems change
+        self.memo = {}
+        self.memo_hits = 0
+        self.memo_misses = 0
+        self.setup()
         self.load(path)
 
     def __exit__(self):
         self.close()
 
+    def setup(self):
+        """
+        Prepare the registry backend (the sqlite database) for loading.
+        """
+        self.conn = sqlite3.connect(self.database or ":memory:")
+
+        # On disk, a write ahead log with a normal sync is faster than the
+        # default, and a crash can lose the last transaction but not corrupt
+        # the file. Setting the journal mode returns the new mode, and we need
+        # to fetch it so the statement is not left in progress.
+        if self.database is not None:
+            self.conn.execute("PRAGMA journal_mode = WAL").fetchall()
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.create_tables()
+
     def close(self):
         self.conn.close()
 
@@ -45,6 +81,10 @@ class SubsystemRegistry:
             queries.create_subsystem_sql,
             queries.create_nodes_sql,
             queries.create_attributes_sql,
+            queries.create_files_sql,
+            queries.create_nodes_type_index_sql,
+            queries.create_attributes_value_index_sql,
+            queries.create_attributes_node_index_sql,
         ]
         for sql in create_sql:
             cursor.execute(sql)
@@ -56,82 +96,196 @@ class SubsystemRegistry:
         """
         if not os.path.exists(path):
             raise ValueError(f"User subsystem directory {path} does not exist.")
-        files = utils.recursive_find(path, "[.]json")
+        files = list(utils.recursive_find(path, "[.]json"))
         if not files:
             raise ValueError(f"There are no subsystem files in {path}")
-        for filename in files:
-            new_subsystem = Subsystem(filename)
-            self.load_subsystem(new_subsystem)
 
-    def load_subsystem(self, subsystem):
+        with self.bulk_load():
+            # An in memory database always starts empty
+            if self.database is None:
+                for new_subsystem in self.load_files(files):
+                    self.load_subsystem(new_subsystem)
+            else:
+                self.load_changed(path, files)
+
+    @contextmanager
+    def bulk_load(self):
         """
-        Load a new subsystem to the memory database
+        Relax durability of an in memory database while we load subsystems.
+
+        It is lost when we exit anyway, so we don't need to sync or keep a
+        journal for every transaction. The previous settings are restored
+        after. A database on disk is not changed, since a crash while loading
+        could leave it corrupted.
         """
+        if self.database is not None:
+            yield
+            return
+
         cursor = self.conn.cursor()
+        synchronous = cursor.execute("PRAGMA synchronous").fetchone()[0]
+        journal_mode = cursor.execute("PRAGMA journal_mode").fetchone()[0]
+        cursor.execute("PRAGMA synchronous = OFF")
+        cursor.execute("PRAGMA journal_mode = MEMORY").fetchall()
+        try:
+            yield
+        finally:
+            cursor.execute(f"PRAGMA synchronous = {synchronous}")
+            cursor.execute(f"PRAGMA journal_mode = {journal_mode}").fetchall()
+
+    def load_file(self, filename):
+        """
+        Load a subsystem file, streaming it if it is large.
+        """
+        return Subsystem(filename, stream=os.path.getsize(filename) > self.stream_size)
 
-        # Create the subsystem - it should error if already exists
-        values = f"('{subsystem.name}')"
-        fields = '("name")'
-        statement = f"INSERT INTO subsystems {fields} VALUES {values}"
-        logger.debug(statement)
-        cursor.execute(statement)
-        self.conn.commit()
+    def load_files(self, files):
+        """
+        Yield a loaded subsystem for each file, in order.
 
-        # These are fields to insert a node and attributes
-        node_fields = '("subsystem", "label", "type", "basename", "name", "id")'
-
-        # First create all nodes
-        for nid, node in subsystem.graph["nodes"].items():
-            typ = node["metadata"]["type"]
-            basename = node["metadata"]["basename"]
-            name = node["metadata"]["name"]
-            id = node["metadata"]["id"]
-            node_values = f"('{subsystem.name}', '{nid}', '{typ}', '{basename}', '{name}', '{id}')"
-            statement = f"INSERT INTO nodes {node_fields} VALUES {node_values}"
-            logger.debug(statement)
-            cursor.execute(statement)
-
-        # Commit transaction
-        self.conn.commit()
-        attr_fields = '("node", "name", "value")'
+        When there is enough to read, files are parsed in a process pool and
+        sent back here (compacted), so subsystems are still added to the registry
+        one at a time and in order (and a duplicate errors in the same way). Files
+        that are large enough to stream are never sent between processes.
+        """
+        parallel = [x for x in files if os.path.getsize(x) <= self.stream_size]
+        if (
+            self.workers == 1
+            or len(parallel) < 2
+            or sum(os.path.getsize(x) for x in parallel) < self.parallel_size
+        ):
+            for filename in files:
+                yield self.load_file(filename)
+            return
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = {x: executor.submit(load_compact_subsystem, x) for x in parallel}
+            for filename in files:
+                if filename in futures:
+                    yield futures[filename].result()
+                else:
+                    yield self.load_file(filename)
+
+    def load_changed(self, path, files):
+        """
+        Load subsystem files that are new or changed since the last load.
 
-        # Now all attributes
-        for nid, node in subsystem.graph["nodes"].items():
-            for key, value in node["metadata"].get("attributes", {}).items():
-                attr_values = f"('{nid}', '{key}', '{value}')"
-                statement = f"INSERT INTO attributes {attr_fields} VALUES {attr_values}"
-                logger.debug(statement)
-                cursor.execute(statement)
+        We first check the file modified time and size, and only read the
+        content to compare the hash if they differ. Subsystems for files that
+        were changed or removed are deleted before anything is loaded.
+        """
+        root = os.path.join(os.path.abspath(path), "")
+        known = {}
+        for record in self.query("SELECT path, subsystem, mtime, size, digest from files;"):
+            if record[0].startswith(root):
+                known[record[0]] = record
 
-        # Note that we aren't doing anything with edges.
-        # We are going to query for nodes we need directly. This assumes
-        # that a software environment would be a global, resource-wide thing.
-        self.conn.commit()
+        cursor = self.conn.cursor()
+        changed = []
+        for filename in files:
+            filename = os.path.abspath(filename)
+            st = os.stat(filename)
+            record = known.pop(filename, None)
+
+            # The file has not been touched
+            if record and record[2] == st.st_mtime and record[3] == st.st_size:
+                continue
+
+            # The file was touched but the content is the same
+            digest = utils.get_file_hash(filename)
+            if record and record[4] == digest:
+                cursor.execute(
+                    "UPDATE files SET mtime = ?, size = ? WHERE path = ?",
+                    (st.st_mtime, st.st_size, filename),
+                )
+                self.conn.commit()
+                continue
+
+            if record:
+                logger.debug(f"Subsystem file {filename} changed, loading again.")
+                self.remove_subsystem(record[1])
+            changed.append((filename, st, digest))
+
+        # Anything left was removed from the subsystem directory. These are
+        # removed first, since a new file might have the same subsystem.
+        for filename, record in known.items():
+            logger.debug(f"Subsystem file {filename} was removed.")
+            self.remove_subsystem(record[1])
+            cursor.execute("DELETE FROM files WHERE path = ?", (filename,))
+            self.conn.commit()
+
+        # Only files that are new or changed are read and loaded
+        new_subsystems = self.load_files([x[0] for x in changed])
+        for (filename, st, digest), new_subsystem in zip(changed, new_subsystems):
+            self.load_subsystem(new_subsystem)
+            cursor.execute(
+                "INSERT OR REPLACE INTO files (path, subsystem, mtime, size, digest) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (filename, new_subsystem.name, st.st_mtime, st.st_size, digest),
+            )
+            self.conn.commit()
 
-    def get_subsystem_node_type(self, subsys, match):
+    def remove_subsystem(self, name):
         """
-        Get nodes of a specific type under a subsystem
+        Remove a subsystem and its nodes and attributes from the database.
         """
-        statement = f"SELECT label from nodes WHERE subsystem = '{subsys}' AND type = '{match}';"
-        labels = self.query(statement)
-        return [f"'{x[0]}'" for x in labels]
+        cursor = self.conn.cursor()
+        cursor.execute("DELETE FROM attributes WHERE subsystem = ?", (name,))
+        cursor.execute("DELETE FROM nodes WHERE subsystem = ?", (name,))
+        cursor.execute("DELETE FROM subsystems WHERE name = ?", (name,))
+        self.conn.commit()
+        self.memo.clear()
 
-    def find_node_attributes(self, attribute, value, labels=None):
+    def load_subsystem(self, subsystem):
         """
-        Given a list of node labels, find children (attributes)
-        that have a specific key/value.
+        Load a new subsystem to the database
+
+        Nodes and attributes are inserted in bulk, in a single transaction,
+        so a subsystem that fails to load is not partially there.
         """
-        # These will typically be node ids, but we need to filter attribute
-        listing = "(%s)" % ",".join(labels)
-        if labels is not None:
-            statement = f"SELECT * from attributes WHERE name = '{attribute}' AND value = '{value}' and node IN {listing};"
-        else:
-            statement = (
-                f"SELECT * from attributes WHERE name = '{attribute}' AND value = '{value}';"
-            )
-        return self.query(statement)
+        logger.debug(f"Loading subsystem {subsystem.name}")
+        self.memo.clear()
+
+        # The connection as a context manager commits, or rolls back on error
+        with self.conn:
+            cursor = self.conn.cursor()
+
+            # Create the subsystem - it should error if already exists
+            cursor.execute(queries.insert_subsystem_sql, (subsystem.name,))
+
+            # Nodes and attributes are inserted in chunks, so a streamed
+            # subsystem is never all in memory. Values are compared as strings.
+            nodes = []
+            attributes = []
+            for nid, node in subsystem.iter_nodes():
+                metadata = node["metadata"]
+                nodes.append(
+                    (
+                        subsystem.name,
+                        nid,
+                        metadata["type"],
+                        metadata["basename"],
+                        metadata["name"],
+                        metadata["id"],
+                    )
+                )
+                for key, value in metadata.get("attributes", {}).items():
+                    attributes.append((subsystem.name, nid, key, str(value)))
+
+                if len(nodes) >= self.insert_size:
+                    cursor.executemany(queries.insert_node_sql, nodes)
+                    cursor.executemany(queries.insert_attribute_sql, attributes)
+                    nodes = []
+                    attributes = []
+
+            cursor.executemany(queries.insert_node_sql, nodes)
+            cursor.executemany(queries.insert_attribute_sql, attributes)
 
-    def query(self, statement):
+        # Note that we aren't doing anything with edges.
+        # We are going to query for nodes we need directly. This assumes
+        # that a software environment would be a global, resource-wide thing.
+
+    def query(self, statement, params=()):
         """
         Issue a query to the database, returning fetchall.
         """
@@ -143,93 +297,172 @@ class SubsystemRegistry:
             printed = printed[:150] + "..."
         logger.info(printed)
 
-        cursor.execute(statement)
+        cursor.execute(statement, params)
         self.conn.commit()
         return cursor.fetchall()
 
+    def exists(self, statement, params=()):
+        """
+        Issue a SELECT EXISTS query, returning True or False.
+        """
+        return bool(self.query(statement, params)[0][0])
+
     def satisfied(self, jobspec, ignore_missing=True):
         """
         Determine if a jobspec is satisfied by user-space subsystems.
 
         If ignore_missing is true, we assume missing the data does not
-        disqualify the job.
+        disqualify the job. The jobspec can be loaded or a filename.
+        """
+        js = jobspec if isinstance(jobspec, core.JobspecBase) else core.Jobspec(jobspec)
+        unsatisfied = self.unsatisfied(js, ignore_missing)
+        if unsatisfied is not None:
+            group, item = unsatisfied
+            print(
+                f"{LogColors.OKBLUE}{js.name}{LogColors.ENDC} {LogColors.RED}NOT OK{LogColors.ENDC} {group}: {item}"
+            )
+            return False
+
+        print(f"{LogColors.OKBLUE}{js.name}{LogColors.ENDC} {LogColors.OKGREEN}OK{LogColors.ENDC}")
+        return True
+
+    def satisfied_many(self, jobspecs, ignore_missing=True, cache=None):
         """
-        js = core.Jobspec(jobspec)
+        Determine if each of many jobspecs is satisfied, loading the registry once.
 
+        The jobspecs can be loaded or filenames. This yields a result (dict) for
+        each, and a jobspec that cannot be loaded has the error. Requirement
+        items that are the same across jobspecs are only checked once.
+        """
+        for jobspec in jobspecs:
+            result = {"jobspec": jobspec, "satisfied": False}
+            try:
+                if not isinstance(jobspec, core.JobspecBase):
+                    jobspec = core.Jobspec(jobspec, cache=cache)
+                result["jobspec"] = getattr(jobspec, "filename", None) or jobspec.name
+                result["name"] = jobspec.name
+                unsatisfied = self.unsatisfied(jobspec, ignore_missing)
+            except Exception as e:
+                result["error"] = getattr(e, "message", None) or str(e)
+                yield result
+                continue
+
+            result["satisfied"] = unsatisfied is None
+            if unsatisfied is not None:
+                result["unsatisfied"] = {"group": unsatisfied[0], "item": unsatisfied[1]}
+            yield result
+
+    def unsatisfied(self, js, ignore_missing=True):
+        """
+        Find the first requirement of a loaded jobspec that is not satisfied.
+
+        This returns the requires group name and item, or None if all are met.
+        """
         # We don't care about the association with tasks - the requires must be met
-        # We could optimize this to be fewer queries, but it's likely trivial for now
-        for _, requires in js.get("requires", {}).items():
+        for group, requires in js.get("requires", {}).items():
             for item in requires:
-                # If this returns None, ignore_missing is True and we ignore/continue
-                subsys = self.get_item_subsystem(item, ignore_missing)
-                if not subsys:
-                    continue
-
-                # Right now just require either:
-                # 1. type, match, without attribute (no query to attribute table)
-                # 2. type, match, attribute, value (query to nodes and attribute table)
-                # 3. attribute and value (query only to attribute table)
-                attribute = item.get("attribute")
-                value = item.get("value")
-                field = item["field"]
-                match = item["match"]
-
-                # We are being strict now and enforcing that field == type
-                # We could support more, but would need to add them to the database
-                # custom attributes should go under attributes
-                if field != "type":
-                    logger.warning(
-                        f'Item {item} is searching for field other than "type," not supported yet.'
-                    )
-                    continue
+                if not self.memo_item_satisfied(item, ignore_missing):
+                    return group, item
 
-                # We need at least a set of either
-                if not all([attribute, value]) or not all([field, match]):
-                    logger.warning(
-                        f"Item {item} is missing 'field' and/or 'match' and cannot be assessed."
-                    )
-                    continue
-
-                # 2. type, match, attribute, value (query to nodes and attribute table)
-                if all([attribute, value, match]):
-                    # "Get nodes in subsystem X of this type"
-                    labels = self.get_subsystem_node_type(subsys, match)
-                    if not labels:
-                        print(
-                            f"{LogColors.OKBLUE}{js.name}{LogColors.ENDC} {LogColors.RED}NOT OK{LogColors.ENDC}"
-                        )
-                        return False
-
-                    # "Get attribute key values associated with any of these nodes"
-                    # Here we get back matches that mean we are good (satisfied)
-                    matches = self.find_node_attributes(attribute, value, labels)
-                    if not matches:
-                        print(
-                            f"{LogColors.OKBLUE}{js.name}{LogColors.ENDC} {LogColors.RED}NOT OK{LogColors.ENDC}"
-                        )
-                        return False
-
-                # 3. attribute and value (query only to attribute table)
-                elif all([attribute, value]):
-                    matches = self.find_node_attributes(attribute, value)
-                    if not matches:
-                        print(
-                            f"{LogColors.OKBLUE}{js.name}{LogColors.ENDC} {LogColors.RED}NOT OK{LogColors.ENDC}"
-                        )
-                        return False
-
-                # 1. type, match, without attribute (no query to attribute table)
-                elif match is not None:
-                    labels = self.get_subsystem_node_type(subsys, match)
-                    if not labels:
-                        print(
-                            f"{LogColors.OKBLUE}{js.name}{LogColors.ENDC} {LogColors.RED}NOT OK{LogColors.ENDC}"
-                        )
-                        return False
+    def memo_item_satisfied(self, item, ignore_missing=True):
+        """
+        Determine if a requirement item is satisfied, remembering the result.
 
-        print(f"{LogColors.OKBLUE}{js.name}{LogColors.ENDC} {LogColors.OKGREEN}OK{LogColors.ENDC}")
+        The same item (e.g., a spack package) is often required by many
+        jobspecs, and the answer only changes when subsystems are loaded.
+        """
+        key = (json.dumps(item, sort_keys=True, default=str), ignore_missing)
+        if key in self.memo:
+            self.memo_hits += 1
+            return self.memo[key]
+        self.memo_misses += 1
+        self.memo[key] = self.item_satisfied(item, ignore_missing)
+        return self.memo[key]
+
+    def memo_stats(self):
+        """
+        Return hits, misses, and size of the requirement item memo.
+        """
+        return {"hits": self.memo_hits, "misses": self.memo_misses, "size": len(self.memo)}
+
+    def item_satisfied(self, item, ignore_missing=True):
+        """
+        Determine if a single requirement item is satisfied.
+
+        Each case is one query that answers yes or no, so we never pull
+        node labels or attributes back into Python. An item we cannot
+        assess is not counted against the jobspec.
+        """
+        # If this returns None, ignore_missing is True and we ignore/continue
+        subsys = self.get_item_subsystem(item, ignore_missing)
+        if not subsys:
+            return True
+
+        # Right now just require either:
+        # 1. type, match, without attribute (no query to attribute table)
+        # 2. type, match, attribute, value (query to nodes and attribute table)
+        # 3. attribute and value (query only to attribute table)
+        attribute = item.get("attribute")
+        value = item.get("value")
+        field = item["field"]
+        match = item["match"]
+
+        # We are being strict now and enforcing that field == type
+        # We could support more, but would need to add them to the database
+        # custom attributes should go under attributes
+        if field != "type":
+            logger.warning(
+                f'Item {item} is searching for field other than "type," not supported yet.'
+            )
+            return True
+
+        # We need at least a set of either
+        if not all([attribute, value]) or not all([field, match]):
+            logger.warning(f"Item {item} is missing 'field' and/or 'match' and cannot be assessed.")
+            return True
+
+        # Attribute values are always stored as strings
+        if value is not None:
+            value = str(value)
+
+        # 2. type, match, attribute, value (query to nodes and attribute table)
+        # "Are there nodes in subsystem X of this type with the attribute key value?"
+        if all([attribute, value, match]):
+            return self.has_node_attribute(subsys, match, attribute, value)
+
+        # 3. attribute and value (query only to attribute table)
+        elif all([attribute, value]):
+            return self.has_attribute(attribute, value)
+
+        # 1. type, match, without attribute (no query to attribute table)
+        elif match is not None:
+            return self.has_node_type(subsys, match)
         return True
 
+    def has_subsystem(self, name):
+        """
+        Determine if a subsystem is loaded.
+        """
+        return self.exists(queries.subsystem_exists_sql, (name,))
+
+    def has_node_type(self, subsys, typ):
+        """
+        Determine if a subsystem has any nodes of a type.
+        """
+        return self.exists(queries.node_type_exists_sql, (subsys, typ))
+
+    def has_attribute(self, attribute, value):
+        """
+        Determine if any node has an attribute with a value.
+        """
+        return self.exists(queries.attribute_exists_sql, (attribute, value))
+
+    def has_node_attribute(self, subsys, typ, attribute, value):
+        """
+        Determine if a subsystem has a node of a type with an attribute value.
+        """
+        return self.exists(queries.node_attribute_exists_sql, (subsys, typ, attribute, value))
+
     def get_item_subsystem(self, item, ignore_missing=True):
         """
         Get the subsystem for an item
@@ -243,21 +476,36 @@ class SubsystemRegistry:
             else:
                 raise ValueError(msg)
 
-        # Check 2: the subsystem exists in our database
-        statement = f"SELECT name from subsystems WHERE name = '{group}';"
-        match = self.query(statement)
-        if not match and not ignore_missing:
+        # Check 2: the subsystem exists in our database. If we ignore
+        # missing subsystems there is no reason to ask.
+        if not ignore_missing and not self.has_subsystem(group):
             raise ValueError(f"User subsystem {group} is not known, and is required.")
 
         return group
 
 
+def load_compact_subsystem(filename):
+    """
+    Load a subsystem in a worker, keeping only what the registry needs.
+
+    Sending a subsystem back to the main process costs about as much as
+    parsing it, so we want it to be as small as possible.
+    """
+    subsystem = Subsystem(filename)
+    subsystem.compact()
+    return subsystem
+
+
 class Subsystem:
-    def __init__(self, filename):
+    def __init__(self, filename, stream=False):
         """
         Load a single subsystem
+
+        If stream is True, nodes and edges are read from the file as
+        they are iterated, and the graph is never fully in memory.
         """
         self._name = None
+        self.stream = stream
         self.load(filename)
 
     def load(self, filename):
@@ -266,6 +514,18 @@ class Subsystem:
         """
         # Derive the subsystem name from the filepath
         basename = os.path.basename(filename)
+
+        # For a stream we only read up to the first node, which has the name
+        if self.stream:
+            self.data = None
+            self.reader = JGFReader(filename)
+            for nid, node in self.reader.iter_nodes():
+                self._name = self.get_name(nid, node)
+                break
+            if self._name is None:
+                raise ValueError(f"Subsystem from {basename} is missing a graph with nodes")
+            return
+
         self.data = utils.read_json(filename)
 
         if "graph" not in self.data:
@@ -280,8 +540,45 @@ class Subsystem:
         """
         Return the graph, which is required to exist and be populated to load.
         """
+        if self.stream:
+            raise ValueError("This subsystem is streamed, use iter_nodes and iter_edges.")
         return self.data["graph"]
 
+    def compact(self):
+        """
+        Drop node metadata and edge fields that a registry does not use.
+        """
+        # The name is derived from the full first node
+        self._name = self.name
+        nodes = {}
+        for nid, node in self.iter_nodes():
+            metadata = node.get("metadata") or {}
+            nodes[nid] = {
+                "metadata": {
+                    key: metadata[key]
+                    for key in ["type", "basename", "name", "id", "attributes"]
+                    if key in metadata
+                }
+            }
+        edges = [{"source": x["source"], "target": x["target"]} for x in self.iter_edges()]
+        self.data = {"graph": {"nodes": nodes, "edges": edges}}
+
+    def iter_nodes(self):
+        """
+        Yield (label, node) for each node in the graph.
+        """
+        if self.stream:
+            return self.reader.iter_nodes()
+        return iter(self.graph["nodes"].items())
+
+    def iter_edges(self):
+        """
+        Yield each edge in the graph.
+        """
+        if self.stream:
+            return self.reader.iter_edges()
+        return iter(self.graph.get("edges") or [])
+
     @property
     def name(self):
         """
@@ -291,11 +588,15 @@ class Subsystem:
         if self._name is not None:
             return self._name
         # The subsystem won't load without nodes, so we have them
-        for nid, node in self.graph["nodes"].items():
-            # This is a fallback to invalid metadata (which should not happen)
-            if "metadata" not in node or "type" not in node["metadata"]:
-                self._name = nid.replace("0", "")
-                return self._name
-
-            self._name = node["metadata"]["type"]
+        for nid, node in self.iter_nodes():
+            self._name = self.get_name(nid, node)
             return self._name
+
+    def get_name(self, nid, node):
+        """
+        Derive the subsystem name from a node.
+        """
+        # This is a fallback to invalid metadata (which should not happen)
+        if "metadata" not in node or "type" not in node["metadata"]:
+            return nid.replace("0", "")
+        return node["metadata"]["type"]
@@ -0,0 +1,129 @@
+import math
+import os
+import re
+
+# Flux standard duration (FSD) units, in seconds
+fsd_units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(duration):
+    """
+    Parse a duration into seconds, the same as flux --time-limit.
+
+    A number (or a string without a unit) is minutes, otherwise we
+    expect a flux standard duration (e.g., 300s, 1.5h).
+    """
+    if isinstance(duration, (int, float)):
+        return float(duration) * 60
+    match = re.fullmatch(r"\s*(?P<value>[0-9]*\.?[0-9]+)(?P<unit>ms|s|m|h|d)?\s*", str(duration))
+    if not match:
+        raise ValueError(f"Duration {duration} is not a number of minutes or a flux duration.")
+    value = float(match.group("value"))
+    unit = match.group("unit")
+    if unit is None:
+        return value * 60
+    return value * fsd_units[unit]
+
+
+def create_resource(res_type, count, with_child=None, exclusive=False):
+    """
+    Create a jobspec resource.
+    """
+    res = {"type": res_type, "count": count}
+    if with_child:
+        res["with"] = with_child
+    if exclusive:
+        res["exclusive"] = True
+    return res
+
+
+def create_slot(label, count, with_child):
+    """
+    Create a jobspec slot.
+    """
+    slot = create_resource("slot", count, with_child)
+    slot["label"] = label
+    return slot
+
+
+def to_jobspec(
+    command,
+    num_tasks=None,
+    cores_per_task=1,
+    gpus_per_task=None,
+    num_nodes=None,
+    exclusive=None,
+    duration=None,
+    environment=None,
+    cwd=None,
+    name=None,
+    dependencies=None,
+    setattrs=None,
+):
+    """
+    Build a flux canonical jobspec (RFC 14, version 1 in RFC 25) for a command.
+
+    This follows what flux submit --dry-run generates for the same options,
+    so we don't need to run flux (and wait for it) just to get json. As with
+    flux submit, the environment is the current one plus any we are given.
+    Shell options (e.g., rlimits) that flux would add are not included.
+    """
+    # Like flux submit, asking for nodes and not tasks gets one task per node,
+    # and the nodes are exclusive.
+    if num_tasks is None:
+        num_tasks = num_nodes or 1
+        if exclusive is None and num_nodes:
+            exclusive = True
+
+    children = [create_resource("core", cores_per_task)]
+    if gpus_per_task:
+        children.append(create_resource("gpu", gpus_per_task))
+
+    if num_nodes is not None:
+        if num_nodes > num_tasks:
+            raise ValueError(f"Number of nodes {num_nodes} is greater than tasks {num_tasks}")
+        num_slots = int(math.ceil(num_tasks / float(num_nodes)))
+
+        # Uneven distribution leaves some slots without a task
+        if num_tasks % num_nodes != 0:
+            task_count = {"total": num_tasks}
+        else:
+            task_count = {"per_slot": 1}
+        slot = create_slot("task", num_slots, children)
+        resources = create_resource("node", num_nodes, [slot], exclusive)
+    else:
+        task_count = {"per_slot": 1}
+        resources = create_slot("task", num_tasks, children)
+
+    system = {"duration": 0}
+    if duration is not None:
+        system["duration"] = parse_duration(duration)
+
+    system["cwd"] = cwd or os.getcwd()
+    env = dict(os.environ)
+    env.update({k: str(v) for k, v in (environment or {}).items()})
+    system["environment"] = env
+
+    if name is not None:
+        system["job"] = {"name": name}
+
+    # Each dependency is a job id that must complete successfully first
+    if dependencies:
+        system["dependencies"] = [{"scheme": "afterok", "value": str(x)} for x in dependencies]
+
+    # Attributes given as dotted keys (e.g., dependency.name) under system
+    for key, value in (setattrs or {}).items():
+        if key.startswith("system."):
+            key = key[len("system.") :]
+        section = system
+        *parents, last = key.split(".")
+        for parent in parents:
+            section = section.setdefault(parent, {})
+        section[last] = value
+
+    return {
+        "resources": [resources],
+        "tasks": [{"command": command, "slot": "task", "count": task_count}],
+        "attributes": {"system": system},
+        "version": 1,
+    }
@@ -0,0 +1,136 @@
+import json
+import re
+import shlex
+
+# Set a variable from the carbon copy id, and run the command
+cc_wrapper = 'export {variable}="$FLUX_JOB_CC"; exec "$@"'
+
+
+def coalesce_steps(steps):
+    """
+    Combine submit steps that are the same into one carbon copy (--cc) submit.
+
+    Steps are the same if they ask for the same command, resources, and
+    attributes, and differ at most in the value of one environment variable
+    that counts up by one (e.g., an index for a parameter sweep). Steps that
+    have or are a dependency are never combined. Returns the new list of
+    steps and the number of submissions saved.
+    """
+    needed = {name for step in steps for name in step.after}
+
+    # Similar steps, by key, in order
+    similar = {}
+    keys = []
+    for step in steps:
+        key = get_key(step, needed)
+        keys.append(key)
+        if key is not None:
+            similar.setdefault(key, []).append(step)
+
+    coalesced = []
+    saved = 0
+    done = set()
+    for step, key in zip(steps, keys):
+        if key is None or len(similar[key]) == 1:
+            coalesced.append(step)
+            continue
+
+        # The combined step goes where the first of the similar steps was
+        if key in done:
+            continue
+        done.add(key)
+        new_step = combine_steps(similar[key])
+        if new_step is None:
+            coalesced += similar[key]
+            continue
+        coalesced.append(new_step)
+        saved += len(similar[key]) - 1
+    return coalesced, saved
+
+
+def get_key(step, needed):
+    """
+    Get a key for steps that can be combined, or None if the step cannot be.
+    """
+    task = step.options.get("task") or {}
+    if step.name != "submit" or step.after or "cc" in task:
+        return
+    if step.options.get("name") in needed:
+        return
+
+    options = step.get_options()
+    if options["watch"] is True:
+        return
+
+    # Everything but the name, replicas, and environment values must match
+    options = {k: v for k, v in options.items() if k not in ["name", "replicas"]}
+    options["environment"] = sorted(options["environment"])
+    options["command"] = task["command"]
+    return json.dumps(options, sort_keys=True, default=str)
+
+
+def combine_steps(steps):
+    """
+    Combine similar steps into one, or return None if we cannot.
+    """
+    first = steps[0]
+    task = dict(first.options["task"])
+
+    # Each job would have the name of the first step, so we name the range
+    name = get_name(steps)
+
+    environments = [
+        (step.options["task"].get("attributes") or {}).get("environment") or {} for step in steps
+    ]
+    varying = [key for key in environments[0] if len({str(env[key]) for env in environments}) > 1]
+
+    # Case 1: the steps are the same, so we can just ask for more of them
+    if not varying:
+        task["replicas"] = sum(step.options["task"].get("replicas") or 1 for step in steps)
+        return first.__class__(first.jobspec, **dict(first.options, task=task, name=name))
+
+    # Case 2: one variable is an index we can get from the carbon copy id
+    if len(varying) > 1:
+        return
+    if any((step.options["task"].get("replicas") or 1) > 1 for step in steps):
+        return
+    variable = varying[0]
+    values = [str(env[variable]) for env in environments]
+    if not all(re.fullmatch("[0-9]+", value) for value in values):
+        return
+    values = sorted(int(value) for value in values)
+    if values != list(range(values[0], values[0] + len(values))):
+        return
+
+    # A script is written to a file, so we can't wrap it
+    command = task["command"]
+    if isinstance(command, str):
+        if re.search("#!/bin/(bash|sh|python)", command):
+            return
+        command = shlex.split(command)
+
+    attributes = dict(task.get("attributes") or {})
+    attributes["environment"] = {k: v for k, v in environments[0].items() if k != variable}
+    task["attributes"] = attributes
+    task["command"] = ["sh", "-c", cc_wrapper.format(variable=variable), "sh"] + list(command)
+    task["cc"] = f"{values[0]}-{values[-1]}"
+    task["replicas"] = len(values)
+    return first.__class__(first.jobspec, **dict(first.options, task=task, name=name))
+
+
+def get_name(steps):
+    """
+    Get a job name for combined steps, or None if they don't share one.
+
+    Steps named with a prefix and consecutive numbers (e.g., a0, a1, a2)
+    are named for the range (a[0-2]).
+    """
+    matches = [
+        re.fullmatch("(.*?)(0|[1-9][0-9]*)", step.options.get("name") or "") for step in steps
+    ]
+    if not all(matches) or len({match.group(1) for match in matches}) != 1:
+        return
+    numbers = sorted(int(match.group(2)) for match in matches)
+    if numbers != list(range(numbers[0], numbers[0] + len(numbers))):
+        return
+    return f"{matches[0].group(1)}[{numbers[0]}-{numbers[-1]}]"
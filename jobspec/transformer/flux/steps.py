@@ -1,6 +1,5 @@
 import copy
 import json
-import os
 import re
 import shlex
 import uuid
@@ -9,8 +8,28 @@ import jobspec.utils as utils
 from jobspec.steps.base import StepBase
 from jobspec.transformer.result import Result
 
+from . import canonical
+
 script_prefix = ["#!/bin/bash"]
 
+# Job ids saved in a batch script are expanded by the shell, and not quoted
+jobid_variable = re.compile(r"\$\{JOBID_[A-Z0-9_]+\[[0-9]+\]\}")
+
+
+def get_script_file(script):
+    """
+    Get a file for the jobspec files section (RFC 37) for a script.
+    """
+    return {"mode": 33216, "data": script, "encoding": "utf-8"}
+
+
+def join_command(cmd):
+    """
+    Join a command for a script line, quoting all but job id variables.
+    """
+    return " ".join(arg if jobid_variable.search(arg) else shlex.quote(arg) for arg in cmd)
+
+
 # Custom Flux steps - just write and register!
 
 
@@ -19,50 +38,72 @@ class stage(StepBase):
     A copy step uses flux filemap to stage across nodes
 
     This assumes we don't have a shared filesystem. It is skipped if we do.
+    All files (filename, or a list of filenames) are mapped under one tag,
+    so each phase (mkdir, map, get, unmap) is one flux command.
     """
 
     name = "stage"
 
-    def run(self, stage, *args, **kwargs):
+    def run(self, stage=None, *args, **kwargs):
         """
         Run the stage step = fall back to filename for now
         """
+        stage = stage or self.options.get("stage")
+        settings = self.options.get("settings", {})
+
         # If we have a sharedfs, return early, the write will have written it there
-        sharedfs = self.options.get("settings", {}).get("sharedfs") is True
+        sharedfs = settings.get("sharedfs") is True
         if sharedfs:
             return
 
+        # Without a directory we would stage to "None"
+        if not stage:
+            raise ValueError("The stage step requires a stage directory.")
+        filenames = self.options.get("filenames") or self.options["filename"]
+        if isinstance(filenames, str):
+            filenames = [filenames]
+
+        # Each phase is timed, and shown with the result
+        result = Result()
+
         # Sanity check staging directory exists across nodes
-        cmd = ["flux", "exec", "-r", "all", "-x", "0", "mkdir", "-p", stage]
-        utils.run_command(cmd, check_output=True)
+        with utils.timed("mkdir", result):
+            cmd = ["flux", "exec", "-r", "all", "-x", "0", "mkdir", "-p", stage]
+            utils.run_command(cmd, check_output=True)
 
         name = str(uuid.uuid4())
-        filename = self.options["filename"]
-        cmd = ["flux", "filemap", "map", "--tags", name, "--directory", stage, filename]
-        utils.run_command(cmd, check_output=True)
+        with utils.timed("map", result):
+            cmd = ["flux", "filemap", "map", "--tags", name, "--directory", stage] + filenames
+            utils.run_command(cmd, check_output=True)
 
         # Assume we send to all ranks besides where we've already written it
-        # This will likely fail if the filesystem is shared
-        cmd = [
-            "flux",
-            "exec",
-            "--dir",
-            stage,
-            "-r",
-            "all",
-            "-x",
-            "0",
-            "flux",
-            "filemap",
-            "get",
-            "--tags",
-            name,
-        ]
-        utils.run_command(cmd, check_output=False)
-
-        # Unmap to clear the memory map
-        cmd = ["flux", "filemap", "unmap", "--tags", name]
-        utils.run_command(cmd, check_output=True)
+        # This will likely fail if the filesystem is shared. With a fanout,
+        # only that many ranks get files at once.
+        try:
+            with utils.timed("get", result):
+                for ranks in self.get_ranks(settings.get("fanout")):
+                    cmd = ["flux", "exec", "--dir", stage, "-r", ranks, "-x", "0"]
+                    cmd += ["flux", "filemap", "get", "--tags", name]
+                    utils.run_command(cmd, check_output=True)
+
+        # Unmap to clear the memory map, even if the get failed
+        finally:
+            with utils.timed("unmap", result):
+                cmd = ["flux", "filemap", "unmap", "--tags", name]
+                utils.run_command(cmd, check_output=True)
+
+        result.out = f"staged {len(filenames)} file(s) to {stage}"
+        return result
+
+    def get_ranks(self, fanout=None):
+        """
+        Get idsets of ranks to stage to, with at most fanout ranks in each.
+        """
+        if not fanout:
+            return ["all"]
+        res = utils.run_command(["flux", "getattr", "size"], check_output=True)
+        size = int(res["message"].strip())
+        return [f"{i}-{min(i + fanout, size) - 1}" for i in range(0, size, fanout)]
 
 
 class JobBase(StepBase):
@@ -70,79 +111,173 @@ class JobBase(StepBase):
     base with shared logic for submit or batch
     """
 
-    def cleanup(self, filename):
+    def generate_jobspec(self, command=None, jobids=None):
         """
-        Cleanup a filename if it still exists
+        Generate the flux jobspec for the step, without running flux.
         """
-        if os.path.exists(filename):
-            os.remove(filename)
-
-    def write_job_script(self, command):
+        options = self.get_options(jobids)
+
+        # Dependencies we don't have ids for (frobnicator plugin) are set as attributes
+        setattrs = {}
+        for depends_on in options["depends_on"]:
+            setattrs["dependency.name"] = depends_on
+
+        js = canonical.to_jobspec(
+            self.get_command(command),
+            num_tasks=options["tasks"],
+            gpus_per_task=options["gpus"],
+            num_nodes=options["nodes"],
+            duration=options["duration"],
+            environment=options["environment"],
+            cwd=options["cwd"],
+            name=options["name"],
+            dependencies=options["dependencies"],
+            setattrs=setattrs,
+        )
+
+        # A script is given in the jobspec, and flux writes it for the job
+        script = self.get_script(command)
+        if script is not None:
+            js["attributes"]["system"]["files"] = {"job-script": get_script_file(script[1])}
+        return js
+
+    def get_script(self, command=None):
         """
-        Given a bash, shell, or python command, write
-        into a script.
+        Given a bash, shell, or python command, return (executable, script)
+
+        If the command is not a script, we return None. The script is given
+        to flux with the job (and not written here) as job-script in the job
+        temporary directory.
         """
+        if not command:
+            task = self.options.get("task") or {}
+            command = task["command"]
+        if not isinstance(command, str) or not re.search("#!/bin/(bash|sh|python)", command):
+            return
         command = command.strip()
         match = re.match("#!/bin/(?P<executable>bash|sh|python)", command)
-        terms = match.groupdict()
-        tmpfile = utils.get_tmpfile(prefix="jobscript-", suffix=".sh")
+        return match.group("executable"), command + "\n"
 
-        # Clean self up (commented out because makes me nervous)
-        command += f"\n# rm -rf {tmpfile}"
-        utils.write_file(command, tmpfile)
-        return [terms["executable"], tmpfile]
+    def submit_jobspecs(self, submitter, jobids=None):
+        """
+        Submit our jobspecs with a submitter (flux handle).
+        """
+        jobspecs, result = self.prepare_jobspecs(jobids)
+        return self.finish(jobids, result, [submitter.submit(js) for js in jobspecs])
 
-    def prepare(self, command=None, waitable=False):
+    def finish(self, jobids, result, submitted):
         """
-        Return the command, without flux submit|batch
+        Finish the result for submitted job ids, and save them for dependencies.
         """
-        cmd = []
+        result.out = "\n".join(submitted)
+        result.add_debug_line("submit jobspec with flux handle")
+        self.save_jobids(jobids, result)
+        return result
+
+    def save_jobids(self, jobids, result):
+        """
+        Save the job ids we submitted, for steps that depend on this one.
+        """
+        name = self.options.get("name")
+        if jobids is not None and name is not None and result.out:
+            jobids[name] = result.out.split()
 
+    def get_options(self, jobids=None):
+        """
+        Derive what we ask flux for from resources, the task, and attributes.
+
+        Dependencies on steps in jobids (name to submitted job ids) are
+        given to flux as job ids, and the rest are left as names.
+        """
         # We can get the resources from options
         resources = self.options.get("resources")
         task = self.options.get("task") or {}
         attributes = task.get("attributes") or {}
 
+        dependencies = []
+        depends_on = []
+        for name in self.depends_on:
+            if jobids and name in jobids:
+                dependencies += jobids[name]
+            else:
+                depends_on.append(name)
+
         # This flattens to be what we ask flux for
         slot = resources.flatten_slot()
-        nodes = slot.get("node")
-        tasks = slot.get("core")
-        gpus = slot.get("gpu")
+        return {
+            "nodes": slot.get("node"),
+            "tasks": slot.get("core"),
+            "gpus": slot.get("gpu"),
+            # Get name, jobspec, depends, etc
+            "name": self.options.get("name"),
+            "duration": attributes.get("duration"),
+            "cwd": attributes.get("cwd"),
+            "watch": attributes.get("watch"),
+            "environment": attributes.get("environment") or {},
+            "dependencies": dependencies,
+            "depends_on": depends_on,
+            "replicas": task.get("replicas"),
+            "cc": task.get("cc"),
+        }
+
+    def get_command(self, command=None):
+        """
+        Get the command to run as a list.
+        """
+        # Right now assume command is required
+        if not command:
+            task = self.options.get("task") or {}
+            command = task["command"]
 
-        # Get name, jobspec, depends, etc
-        name = self.options.get("name")
-        duration = attributes.get("duration")
-        cwd = attributes.get("cwd")
-        watch = attributes.get("watch")
+        # Case 1: we are given a script, which flux writes for the job
+        script = self.get_script(command)
+        if script is not None:
+            return [script[0], "{{tmpdir}}/job-script"]
+
+        # String that should be a list
+        if isinstance(command, str):
+            command = shlex.split(command)
+        return command
+
+    def prepare(self, command=None, waitable=False, jobids=None):
+        """
+        Return the command, without flux submit|batch
+        """
+        cmd = []
+        options = self.get_options(jobids)
 
         # Environment
-        for key, value in attributes.get("environment", {}).items():
+        for key, value in options["environment"].items():
             cmd += [f"--env={key}={value}"]
 
         # Note that you need to install our frobnicator plugin
         # for this to work. See the examples/depends_on directory
-        for depends_on in task.get("depends_on") or []:
+        for depends_on in options["depends_on"]:
             cmd += [f"--setattr=dependency.name={depends_on}"]
-
-        if cwd is not None:
-            cmd += ["--cwd", cwd]
-        if name is not None:
-            cmd += ["--job-name", name]
-        if duration is not None:
-            cmd += ["--time-limit", str(duration)]
-        if watch is True:
+        for jobid in options["dependencies"]:
+            cmd += [f"--dependency=afterok:{jobid}"]
+
+        if options["cwd"] is not None:
+            cmd += ["--cwd", options["cwd"]]
+        if options["name"] is not None:
+            cmd += ["--job-name", options["name"]]
+        if options["duration"] is not None:
+            cmd += ["--time-limit", str(options["duration"])]
+        if options["watch"] is True:
             cmd += ["--watch"]
 
-        if nodes:
-            cmd += ["-N", str(nodes)]
-        if tasks:
-            cmd += ["-n", str(tasks)]
-        if gpus:
-            cmd += ["-g", str(gpus)]
-
-        # Replicas we do with cc
-        replicas = task.get("replicas")
-        if replicas:
+        if options["nodes"]:
+            cmd += ["-N", str(options["nodes"])]
+        if options["tasks"]:
+            cmd += ["-n", str(options["tasks"])]
+        if options["gpus"]:
+            cmd += ["-g", str(options["gpus"])]
+
+        # Replicas we do with cc, unless we are given the ids
+        replicas = options["replicas"]
+        if options["cc"]:
+            cmd += ["--cc", options["cc"]]
+        elif replicas:
             replicas -= 1
             cmd += ["--cc", f"0-{replicas}"]
 
@@ -151,19 +286,12 @@ class JobBase(StepBase):
         if waitable:
             cmd += ["--flags=waitable"]
 
-        # Right now assume command is required
-        if not command:
-            command = task["command"]
-
-        # Case 1: we are given a script to write
-        if isinstance(command, str) and re.search("#!/bin/(bash|sh|python)", command):
-            command = self.write_job_script(command)
-
-        # String that should be a list
-        if isinstance(command, str):
-            command = shlex.split(command)
+        # A script is added to the jobspec (a value with a newline is content)
+        script = self.get_script(command)
+        if script is not None:
+            cmd += [f"--add-file=job-script={script[1]}"]
 
-        cmd += command
+        cmd += self.get_command(command)
         return cmd
 
 
@@ -186,115 +314,185 @@ class batch(JobBase):
         """
         self.tasks = []
 
-    def write_tasks_script(self):
+    @property
+    def after(self):
+        """
+        A batch is submitted after what it and its tasks depend on outside of it.
+        """
+        names = {task.options.get("name") for task in self.tasks}
+        after = list(self.depends_on)
+        for task in self.tasks:
+            after += [x for x in task.after if x not in names and x not in after]
+        return after
+
+    def write_tasks_script(self, jobids=None):
         """
         Generate the batch script.
+
+        A job that another in the batch depends on saves its ids in a
+        (bash array) variable, and the dependent job uses them. The jobspec
+        for a batch in the batch is given to flux job submit in a heredoc.
+        We return the script file, and the lines to show for debug, where
+        each heredoc is replaced (it has the entire environment). Ids of jobs
+        submitted before the batch (jobids) can be used by any task in it.
         """
         data = copy.deepcopy(script_prefix)
+        shown = copy.deepcopy(script_prefix)
+        needed = {name for task in self.tasks for name in task.depends_on}
+        outer = jobids or {}
+        jobids = dict(outer)
         for task in self.tasks:
+            jobspec = None
             if task.name == "batch":
-                cmd, _ = task.generate_command(waitable=True)
-                data.append(" ".join(cmd))
-                # This is the jobspec
-                data.append(f"# rm -rf {cmd[-1]}")
+                # The heredoc is not expanded, so only outer ids can be used
+                cmd, jobspec, _ = task.generate_command(waitable=True, jobids=outer)
+            else:
+                cmd = task.generate_command(waitable=True, jobids=jobids)
+            line = join_command(cmd)
+
+            # The heredoc (not expanded by the shell) follows the command
+            heredoc = ""
+            placeholder = ""
+            if jobspec is not None:
+                line += " <<'JOBSPEC'"
+                heredoc = f"\n{jobspec}\nJOBSPEC"
+                placeholder = f"\n<jobspec not shown, {len(jobspec)} bytes>\nJOBSPEC"
+
+            name = task.options.get("name")
+            if name in needed:
+                variable = "JOBID_" + re.sub("[^A-Za-z0-9_]", "_", name).upper()
+                data.append(f"{variable}=($({line}{heredoc}\n))")
+                shown.append(f"{variable}=($({line}{placeholder}\n))")
+                replicas = (task.options.get("task") or {}).get("replicas") or 1
+                jobids[name] = [f"${{{variable}[{i}]}}" for i in range(replicas)]
             else:
-                data.append(" ".join(task.generate_command(waitable=True)))
+                data.append(line + heredoc)
+                shown.append(line + placeholder)
 
         # Ensure all jobs are waited on
-        data.append("flux job wait --all")
-        script = "\n".join(data)
-        return {"mode": 33216, "data": script, "encoding": "utf-8"}
+        for lines in data, shown:
+            lines.append("flux job wait --all")
+        return get_script_file("\n".join(data)), "\n".join(shown).split("\n")
 
-    def generate_command(self, waitable=False):
+    def generate_batch_jobspec(self, jobids=None):
         """
-        Convenience function to generate the command.
-
-        This is also intended for flux batch to use,
-        and we expect the last argument to be the temporary file
-        that needs to be cleaned up
+        Generate the jobspec for the batch, with the batch script as a file.
         """
-        # With batch, we are going to cheat and run a flux job submit --dry-run
-        # with the command that would normally be derived for flux batch.
+        # With batch, we build the jobspec that flux submit --dry-run would
+        # give us for the command that would normally be derived for flux batch.
         command = ["flux", "broker", "{{tmpdir}}/batch-script"]
-        cmd = self.prepare(command)
-
-        # This returns a partial jobspec for the work that is needed...
-        cmd = ["flux", "submit", "--dry-run"] + cmd
-        res = utils.run_command(cmd, check_output=True)
-
-        if res["return_code"] != 0:
-            raise ValueError(f"Issue generating flux jobspec: {res['message']}")
+        js = self.generate_jobspec(command, jobids)
 
         # Then we will add our (not written) batch script to the files section
-        # Load the jobspec and add our "files" section to it with tasks (flux submit, etc)
-        js = json.loads(res["message"])
-
-        # Be careful about updating files - not sure if there are cases
-        # when there might be other content there.
         files = js["attributes"]["system"].get("files") or {}
-        files["batch-script"] = self.write_tasks_script()
+        files["batch-script"], shown = self.write_tasks_script(jobids)
         js["attributes"]["system"]["files"] = files
 
-        # Write the jobspec to a temporary file, target for cleanup
-        tmpfile = utils.get_tmpfile(prefix="jobspec-")
-        utils.write_file(json.dumps(js), tmpfile)
-
         # Prepare a result, we can show the batch script if debug is on
         result = Result()
-        for line in files["batch-script"]["data"].split("\n"):
+        for line in shown:
             result.add_debug_line(line)
+        return js, result
+
+    def prepare_jobspecs(self, jobids=None):
+        """
+        Prepare jobspecs to submit, and a result to finish.
+        """
+        js, result = self.generate_batch_jobspec(jobids)
+        return [js], result
+
+    def generate_command(self, waitable=False, jobids=None):
+        """
+        Convenience function to generate the command.
 
-        # and submit with flux job submit <jobspec>
+        This is also intended for flux batch to use. We return the command,
+        the jobspec (json) to give it on stdin, and the result.
+        """
+        js, result = self.generate_batch_jobspec(jobids)
+
+        # and submit with flux job submit, which reads the jobspec from stdin
         # We can't really watch here, or do anything with attributes yet
         cmd = ["flux", "job", "submit"]
         if waitable:
             cmd += ["--flags=waitable"]
-        cmd.append(tmpfile)
-        return cmd, result
+        return cmd, json.dumps(js), result
 
-    def run(self, *args, **kwargs):
+    def run(self, *args, submitter=None, jobids=None, **kwargs):
         """
         Run the batch step
+
+        With a submitter (flux handle) the jobspec is submitted directly,
+        otherwise we give it to flux job submit on stdin.
         """
-        cmd, result = self.generate_command()
-        res = utils.run_command(cmd, check_output=True)
+        if submitter is not None:
+            return self.submit_jobspecs(submitter, jobids)
 
-        # The temporary file to cleanup is the last in the list
-        tmpfile = cmd[-1]
+        cmd, jobspec, result = self.generate_command(jobids=jobids)
+        res = utils.run_command(cmd, check_output=True, stdin=jobspec)
 
         # Prepare a result to return
         result.out = res["message"].strip()
         result.add_debug_line(" ".join(cmd))
-
-        # Cleanup the files
-        self.cleanup(tmpfile)
+        self.save_jobids(jobids, result)
         return result
 
 
 class submit(JobBase):
     name = "submit"
 
-    def generate_command(self, waitable=False):
+    def generate_command(self, waitable=False, jobids=None):
         """
         Convenience function to generate the command.
 
         This is intended for flux batch to use
         """
-        cmd = self.prepare(waitable=waitable)
+        cmd = self.prepare(waitable=waitable, jobids=jobids)
         return ["flux", "submit"] + cmd
 
-    def run(self, *args, **kwargs):
+    def prepare_jobspecs(self, jobids=None):
         """
-        Run the submit step.
+        Prepare jobspecs to submit, and a result to finish.
+        """
+        return self.generate_jobspecs(jobids), Result()
 
-        The python bindings are giving me weird errors.
+    def generate_jobspecs(self, jobids=None):
+        """
+        Generate a jobspec for each replica (flux submit --cc).
         """
-        cmd = self.generate_command()
+        js = self.generate_jobspec(jobids=jobids)
+        options = self.get_options()
+        if not options["replicas"] and not options["cc"]:
+            return [js]
+
+        # Like --cc, each replica knows its id from the environment
+        ids = range(options["replicas"])
+        if options["cc"]:
+            start, end = options["cc"].split("-")
+            ids = range(int(start), int(end) + 1)
+
+        jobspecs = []
+        for cc in ids:
+            replica = copy.deepcopy(js)
+            replica["attributes"]["system"]["environment"]["FLUX_JOB_CC"] = str(cc)
+            jobspecs.append(replica)
+        return jobspecs
+
+    def run(self, *args, submitter=None, jobids=None, **kwargs):
+        """
+        Run the submit step.
 
+        With a submitter (flux handle) we submit jobspecs directly,
+        otherwise we use flux submit. Watching needs flux submit.
+        """
         # Are we watching?
         task = self.options.get("task") or {}
         attributes = task.get("attributes") or {}
         watch = attributes.get("watch")
+
+        if submitter is not None and watch is not True:
+            return self.submit_jobspecs(submitter, jobids)
+
+        cmd = self.generate_command(jobids=jobids)
         res = utils.run_command(cmd, check_output=True, stream=watch)
 
         # Prepare a result to return
@@ -304,4 +502,5 @@ class submit(JobBase):
         if not watch:
             result.out = res["message"].strip()
         result.add_debug_line(" ".join(cmd))
+        self.save_jobids(jobids, result)
         return result
@@ -0,0 +1,85 @@
+import json
+import threading
+
+from jobspec.logger import logger
+
+
+def get_submitter():
+    """
+    Get a submitter for the flux python bindings, if we can.
+
+    If the bindings are not installed (or we cannot connect to flux)
+    we return None, and steps fall back to the flux command line.
+    """
+    try:
+        return FluxSubmitter()
+    except (ImportError, OSError) as e:
+        logger.debug(f"Cannot use flux python bindings, will use the command line: {e}")
+
+
+class FluxSubmitter:
+    """
+    Submit jobspecs over a single flux handle.
+
+    Opening the handle once means submitting many jobs doesn't start a
+    flux process for each one. Anything with the same submit method (for
+    example, a stand-in that records jobspecs) can be used in its place.
+    """
+
+    def __init__(self, handle=None):
+        import flux
+        import flux.job
+
+        self.job = flux.job
+        self.handle = handle or flux.Flux()
+
+        # A handle is not safe to use from more than one thread at once
+        self.lock = threading.Lock()
+
+    def submit(self, jobspec, waitable=False):
+        """
+        Submit a jobspec (dict) and return the job id.
+        """
+        jobspec = json.dumps(jobspec)
+        with self.lock:
+            jobid = self.job.submit(self.handle, jobspec, waitable=waitable)
+        return format_jobid(jobid)
+
+    def submit_many(self, jobspecs, waitable=False):
+        """
+        Submit jobspecs together, and return an iterator of job ids in order.
+
+        All jobspecs are sent before we wait for any job id, so there is
+        one round trip to the broker instead of one for each job. Waiting
+        for an id uses the handle too, so the lock is held until all are
+        read. An error for a jobspec is raised when we get to its id.
+        """
+        jobids = []
+        with self.lock:
+            futures = [
+                self.job.submit_async(self.handle, json.dumps(js), waitable=waitable)
+                for js in jobspecs
+            ]
+            for future in futures:
+                try:
+                    jobids.append(format_jobid(future.get_id()))
+                except Exception as e:
+                    jobids.append(e)
+        return iter_jobids(jobids)
+
+
+def iter_jobids(jobids):
+    """
+    Yield job ids in order, raising an error we saved in place of one.
+    """
+    for jobid in jobids:
+        if isinstance(jobid, Exception):
+            raise jobid
+        yield jobid
+
+
+def format_jobid(jobid):
+    """
+    Format a job id from the bindings (e.g., a JobID) as f58, if we can.
+    """
+    return str(getattr(jobid, "f58", jobid))
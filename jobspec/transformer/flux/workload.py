@@ -1,11 +1,15 @@
-import copy
+import json
 
 import jobspec.core as js
 import jobspec.core.resources as rcore
-from jobspec.logger import LogColors
+import jobspec.steps.runner as step_runner
+from jobspec.logger import LogColors, logger
 from jobspec.runner import TransformerBase
+from jobspec.steps.dag import sort_steps
 
+from .coalesce import coalesce_steps
 from .steps import batch, stage, submit
+from .submitter import get_submitter
 
 
 class FluxWorkload(TransformerBase):
@@ -21,6 +25,12 @@ class FluxWorkload(TransformerBase):
     name = "flux"
     description = "Flux Framework workload"
 
+    # Submit with this instead of a flux handle we open (e.g., a stand-in)
+    submitter = None
+
+    # Combine tasks that are the same into one carbon copy submit
+    coalesce = False
+
     def announce(self):
         """
         Announce prints an additional prefix during run
@@ -28,6 +38,65 @@ class FluxWorkload(TransformerBase):
         prefix = "flux workload".ljust(15)
         print(f"=> {LogColors.OKCYAN}{prefix}{LogColors.ENDC}")
 
+    def run(self, filename):
+        """
+        Run the workload, submitting all steps over one flux handle.
+
+        If the flux python bindings are not available, steps use the
+        flux command line instead.
+        """
+        submitter = self.submitter or get_submitter()
+
+        # Steps save the ids of jobs they submit, by name, for dependencies
+        self.step_options = {"submitter": submitter, "jobids": {}}
+        try:
+            super().run(filename)
+        finally:
+            self.step_options = None
+
+    def run_steps(self, steps):
+        """
+        Run steps, submitting those that don't depend on another together.
+
+        Jobspecs for these steps are all prepared first, and then submitted
+        in bulk over the flux handle. The rest are submitted after, one at
+        a time, when the ids they depend on are known.
+        """
+        submitter = self.step_options["submitter"]
+        if submitter is None or (self.workers and self.workers > 1):
+            return super().run_steps(steps)
+
+        jobids = self.step_options["jobids"]
+        names = {step.options.get("name") for step in steps}
+        bulk = []
+        rest = []
+        for step in steps:
+            task = step.options.get("task") or {}
+            watch = (task.get("attributes") or {}).get("watch") is True
+            if watch or names.intersection(step.after):
+                rest.append(step)
+            else:
+                bulk.append(step)
+
+        prepared = [step.prepare_jobspecs(jobids) for step in bulk]
+        submit_many = getattr(submitter, "submit_many", None)
+        jobspecs = [js for step_jobspecs, _ in prepared for js in step_jobspecs]
+        if submit_many is not None:
+            submitted = submit_many(jobspecs)
+        else:
+            submitted = (submitter.submit(js) for js in jobspecs)
+
+        # Job ids come back in order, so each step takes as many as it sent
+        for step, (step_jobspecs, result) in zip(bulk, prepared):
+            try:
+                ids = [next(submitted) for _ in step_jobspecs]
+            except Exception as e:
+                step_runner.show_error(self.name, step, e)
+            step_runner.show(self.name, step, step.finish(jobids, result, ids))
+
+        for step in rest:
+            step_runner.run(self.name, step, **self.step_options)
+
     def parse(self, jobspec):
         """
         Parse the jobspec into tasks for flux.
@@ -35,6 +104,10 @@ class FluxWorkload(TransformerBase):
         # Reset the jobspec and groups and tasks
         self.js = jobspec
         self.group_lookup = {}
+        self.saved = 0
+
+        # Named resources (and slot) are flattened once and shared
+        self.resource_lookup = {}
 
         # Top level, a-la-carte tasks (steps)
         self.tasks = []
@@ -52,9 +125,8 @@ class FluxWorkload(TransformerBase):
             self.tasks = self.parse_tasks(tasks, self.resources, requires=self.requires)
 
         # Now parse remaining groups "a la carte" that aren't linked to top level tasks
-        # We copy because otherwise the dict changes size when the task parser removes
-        groups = copy.deepcopy(self.group_lookup)
-        for name, group in groups.items():
+        # We list the items because otherwise the dict changes size when the task parser removes
+        for name, group in list(self.group_lookup.items()):
             # Check if the group was already removed by another group task,
             # and don't run if it was!
             if name not in self.group_lookup:
@@ -64,6 +136,11 @@ class FluxWorkload(TransformerBase):
                 0, self.parse_group(group, name, self.resources, requires=self.requires)
             )
 
+        # Steps that depend on others (by name) are run after them
+        self.tasks = self.coalesce_steps(sort_steps(self.tasks))
+        if self.coalesce:
+            logger.info(f"Coalescing similar tasks saved {self.saved} submissions")
+
         # Return the transformer to call run to
         return self.tasks
 
@@ -78,6 +155,35 @@ class FluxWorkload(TransformerBase):
     def requires(self):
         return self.js.get("requires", {})
 
+    def get_resources(self, resources, requested, slot=None):
+        """
+        Get resources for a task or group, flattened now instead of at submit.
+
+        Resources that reference the same named resource (and slot) are shared,
+        so each distinct resource tree is only flattened once.
+        """
+        key = None
+        if isinstance(requested, str):
+            key = (requested, json.dumps(slot, sort_keys=True))
+            if key in self.resource_lookup:
+                return self.resource_lookup[key]
+
+        new_resources = js.Resources(rcore.parse_resource_subset(resources, requested), slot=slot)
+        new_resources.flatten_slot()
+        if key is not None:
+            self.resource_lookup[key] = new_resources
+        return new_resources
+
+    def coalesce_steps(self, steps):
+        """
+        Combine similar submit steps, if asked to, and count what we saved.
+        """
+        if not self.coalesce:
+            return steps
+        steps, saved = coalesce_steps(steps)
+        self.saved += saved
+        return steps
+
     def parse_group(self, group, name, resources=None, requires=None, attributes=None):
         """
         Parse a group and return a step. If tasks are within a group,
@@ -92,12 +198,12 @@ class FluxWorkload(TransformerBase):
         group_resources = group.get("resources", {})
         group_attributes = group.get("attributes", {})
 
-        # Group requires gets updated from globa (and passed to task)
-        group_requires = js.Requires(requires)
-        group_requires.update(group.get("requires"))
+        # Group requires are layered on those from the parent (and passed to
+        # task). The parent data is shared, and never copied.
+        group_requires = js.Requires(requires, shared=True).update(group.get("requires"))
 
         # Group resources don't have a slot
-        group_resources = js.Resources(rcore.parse_resource_subset(resources, group_resources))
+        group_resources = self.get_resources(resources, group_resources)
 
         # Parse the task steps for the group
         tasks = group.get("tasks") or []
@@ -114,6 +220,8 @@ class FluxWorkload(TransformerBase):
             )
 
         # Prepare a batch (group) step
+        # Tasks in the batch script are also written in dependency order
+        steps = sort_steps(steps)
         new_step = batch(
             self.js,
             name=name,
@@ -121,6 +229,7 @@ class FluxWorkload(TransformerBase):
             attributes=group_attributes,
             requires=group_requires,
             tasks=tasks,
+            depends_on=group.get("depends_on"),
         )
         new_step.tasks = steps
         return new_step
@@ -137,16 +246,15 @@ class FluxWorkload(TransformerBase):
         # If the task has resources, must be:
         #  A named section in the global resources
         #  A subset of parent resources
-        task_resources = js.Resources(
-            rcore.parse_resource_subset(resources, task_resources), slot=slot
-        )
+        task_resources = self.get_resources(resources, task_resources, slot=slot)
 
-        # Derive and update task attributes, if provided
-        task_attributes = js.Attributes(attributes).update(task.get("attributes"))
+        # Derive and update task attributes, if provided. Parent data is
+        # shared, and the task values are a layer on top.
+        task_attributes = js.Attributes(attributes, shared=True).update(task.get("attributes"))
 
         # Same for requires. This might eventually include retrieval of
         # artifact metadata first.
-        task_requires = js.Requires(requires).update(task.get("requires"))
+        task_requires = js.Requires(requires, shared=True).update(task.get("requires"))
 
         # Prepare a submit step
         return submit(
@@ -1,12 +1,20 @@
+import hashlib
 import json
 import os
 import re
 import subprocess
 import tempfile
+import time
 from contextlib import contextmanager
 
 import yaml
 
+# The libyaml loader is much faster, when it is available
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 
 def read_json(filename):
     """
@@ -15,6 +23,30 @@ def read_json(filename):
     return json.loads(read_file(filename))
 
 
+def read_structured(filename):
+    """
+    Read json or yaml from file, reading it only once.
+    """
+    return load_structured(read_file(filename), filename)
+
+
+def load_structured(content, filename=None):
+    """
+    Load json or yaml content.
+
+    The format is determined by the file extension if we have one, and
+    otherwise we sniff the first character (json is an object or list).
+    Content that is not valid json falls back to yaml.
+    """
+    ext = os.path.splitext(filename or "")[-1].lower()
+    if ext not in [".yaml", ".yml"] and (ext == ".json" or re.match(r"\s*[\[{]", content)):
+        try:
+            return json.loads(content)
+        except ValueError:
+            pass
+    return yaml.load(content, Loader=SafeLoader)
+
+
 def read_file(filename):
     """
     Read in a file content
@@ -24,6 +56,17 @@ def read_file(filename):
     return content
 
 
+def get_file_hash(filename, algorithm="sha256", chunk_size=1024 * 1024):
+    """
+    Get the hash of a file, reading it in chunks.
+    """
+    hasher = hashlib.new(algorithm)
+    with open(filename, "rb") as fd:
+        for chunk in iter(lambda: fd.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
 def recursive_find(base, pattern="[.]py"):
     """recursive find will yield python files in all directory levels
     below a base path.
@@ -77,7 +120,7 @@ def read_yaml(filename):
     Read yaml from file
     """
     with open(filename, "r") as fd:
-        content = yaml.safe_load(fd)
+        content = yaml.load(fd, Loader=SafeLoader)
     return content
 
 
@@ -113,15 +156,36 @@ def workdir(dirname):
         os.chdir(here)
 
 
-def run_command(cmd, stream=False, check_output=False, return_code=0):
+@contextmanager
+def timed(phase, result):
+    """
+    Time a phase of a step, and add it to the result as a debug line.
+    """
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        result.add_debug_line(f"{phase} {time.monotonic() - start:.3f}s")
+
+
+def run_command(cmd, stream=False, check_output=False, return_code=0, stdin=None):
     """
     use subprocess to send a command to the terminal.
 
     If check_output is True, check against an expected return code.
+    If stdin (a string) is provided, it is given to the command.
     """
     stdout = subprocess.PIPE if not stream else None
-    output = subprocess.Popen(cmd, stderr=subprocess.STDOUT, stdout=stdout, env=os.environ.copy())
-    t = output.communicate()[0], output.returncode
+    output = subprocess.Popen(
+        cmd,
+        stderr=subprocess.STDOUT,
+        stdout=stdout,
+        stdin=subprocess.PIPE if stdin is not None else None,
+        env=os.environ.copy(),
+    )
+    if stdin is not None:
+        stdin = stdin.encode("utf-8")
+    t = output.communicate(stdin)[0], output.returncode
     output = {"message": t[0], "return_code": t[1]}
 
     if isinstance(output["message"], bytes):
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+import argparse
+import glob
+import json
+import os
+import shlex
+import subprocess
+
+here = os.path.dirname(os.path.abspath(__file__))
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        description="Record flux submit --dry-run output for each fixture here."
+    )
+    parser.add_argument(
+        "--flux", help="command to run instead of flux (e.g., in a container)", default="flux"
+    )
+    parser.add_argument("--source", help="where the output came from (default is flux version)")
+    return parser
+
+
+def get_source(flux):
+    """
+    Describe the flux that we recorded with.
+    """
+    out = subprocess.check_output(flux + ["version"], text=True)
+    return "flux submit --dry-run, " + " ".join(out.split("\n")[0].split())
+
+
+def main():
+    args = get_parser().parse_args()
+    flux = shlex.split(args.flux)
+    source = args.source or get_source(flux)
+    for filename in sorted(glob.glob(os.path.join(here, "*.json"))):
+        with open(filename) as fd:
+            fixture = json.load(fd)
+        jobspec = json.loads(subprocess.check_output(flux + fixture["flux"][1:]))
+
+        # These depend on where flux is run, and are not compared
+        for key in ["environment", "shell", "cwd"]:
+            jobspec["attributes"]["system"].pop(key, None)
+        fixture["source"] = source
+        fixture["jobspec"] = jobspec
+        with open(filename, "w") as fd:
+            fd.write(json.dumps(fixture, indent=2, ensure_ascii=False) + "\n")
+        print(f"Recorded {os.path.basename(filename)}")
+
+
+if __name__ == "__main__":
+    main()
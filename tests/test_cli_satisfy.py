@@ -0,0 +1,28 @@
+import os
+
+import pytest
+
+from jobspec.cli.satisfy import find_jobspecs
+
+here = os.path.dirname(os.path.abspath(__file__))
+subsystem_dir = os.path.join(os.path.dirname(here), "examples", "subsystems")
+
+
+def test_find_jobspecs_skips_subsystems():
+    """
+    A directory with jobspecs and subsystem (JGF) files only gives the jobspecs.
+    """
+    jobspecs = [os.path.basename(x) for x in find_jobspecs([subsystem_dir])]
+    assert jobspecs == [
+        "jobspec-module-subsystem-satisfied.yaml",
+        "jobspec-spack-subystem-satisfied.yaml",
+        "jobspec-spack-subystem-unsatisfied.yaml",
+    ]
+
+
+def test_find_jobspecs_missing(tmp_path):
+    """
+    A missing path exits before any jobspec is returned.
+    """
+    with pytest.raises(SystemExit):
+        find_jobspecs([subsystem_dir, str(tmp_path / "missing.yaml")])
@@ -0,0 +1,81 @@
+import jobspec.core as js
+import jobspec.core.core as core
+from jobspec.transformer.flux.workload import FluxWorkload
+
+resources = {
+    "type": "node",
+    "count": 2,
+    "with": [{"type": "slot", "replicas": 1, "with": [{"type": "core", "count": 4}]}],
+}
+
+jobspec_yaml = """
+version: 1
+resources:
+  shared:
+    type: node
+    count: 2
+    with:
+    - type: core
+      count: 4
+  other:
+    type: node
+    count: 1
+tasks:
+- name: a
+  command: ["echo", "a"]
+  resources: shared
+- name: b
+  command: ["echo", "b"]
+  resources: shared
+- name: c
+  command: ["echo", "c"]
+  resources: other
+"""
+
+
+def count_walks(monkeypatch):
+    """
+    Count each time a resource tree is walked to flatten it.
+    """
+    walks = []
+    find_resources = core.find_resources
+
+    def record(flat, resource, slot, *args):
+        walks.append(resource.get("type"))
+        return find_resources(flat, resource, slot, *args)
+
+    monkeypatch.setattr(core, "find_resources", record)
+    return walks
+
+
+def test_flatten_slot_once(monkeypatch):
+    """
+    Our own slot is flattened once, and another slot is not saved.
+    """
+    walks = count_walks(monkeypatch)
+    resource = js.Resources(resources)
+    flat = resource.flatten_slot()
+    assert flat == {"node": 2, "core": 4}
+    assert resource.flatten_slot() is flat
+    assert walks == ["node"]
+
+    assert resource.flatten_slot({"type": "slot"}) == flat
+    resource.flatten_slot({"type": "slot"})
+    assert walks == ["node", "node", "node"]
+
+
+def test_shared_named_resources(tmp_path, monkeypatch):
+    """
+    Tasks that use the same named resource share one flattened resource.
+    """
+    filename = tmp_path / "jobspec.yaml"
+    filename.write_text(jobspec_yaml)
+    walks = count_walks(monkeypatch)
+    steps = FluxWorkload().parse(js.Jobspec(str(filename)))
+    by_name = {step.options["name"]: step.options["resources"] for step in steps}
+
+    assert by_name["a"] is by_name["b"]
+    assert by_name["a"] is not by_name["c"]
+    assert by_name["a"].flatten_slot() == {"node": 2, "core": 4}
+    assert by_name["c"].flatten_slot() == {"node": 1}
+    assert len(walks) == 2
@@ -0,0 +1,61 @@
+import glob
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from jobspec.transformer.flux.canonical import to_jobspec
+
+here = os.path.dirname(os.path.abspath(__file__))
+
+# Each fixture has a flux submit --dry-run command, what we give to_jobspec
+# for the same options, and the jobspec flux gave us (see record.py)
+fixtures = sorted(glob.glob(os.path.join(here, "data", "dry-run", "*.json")))
+
+
+def strip(jobspec):
+    """
+    Remove the environment, shell options, and cwd, which depend on where flux runs.
+    """
+    jobspec = json.loads(json.dumps(jobspec))
+    system = jobspec["attributes"]["system"]
+    for key in ["environment", "shell", "cwd"]:
+        system.pop(key, None)
+    return jobspec
+
+
+def load_fixture(filename):
+    with open(filename) as fd:
+        return json.load(fd)
+
+
+@pytest.mark.parametrize("filename", fixtures, ids=os.path.basename)
+def test_matches_dry_run(filename):
+    """
+    Our jobspec is the same as the fixture dry run for the same options.
+    """
+    fixture = load_fixture(filename)
+    jobspec = to_jobspec(**fixture["options"])
+    assert strip(jobspec) == strip(fixture["jobspec"])
+
+
+@pytest.mark.skipif(shutil.which("flux") is None, reason="flux is not installed")
+@pytest.mark.parametrize("filename", fixtures, ids=os.path.basename)
+def test_fixture_is_current(filename):
+    """
+    The fixture is what the installed flux gives us.
+    """
+    fixture = load_fixture(filename)
+    out = subprocess.check_output(fixture["flux"])
+    assert strip(json.loads(out)) == strip(fixture["jobspec"])
+
+
+def test_environment():
+    """
+    The environment is the current one, with what we are given added.
+    """
+    jobspec = to_jobspec(["hostname"], environment={"JOBSPEC_TEST": 1})
+    environment = jobspec["attributes"]["system"]["environment"]
+    assert environment == dict(os.environ, JOBSPEC_TEST="1")
@@ -0,0 +1,54 @@
+import itertools
+
+from jobspec.transformer.flux.workload import FluxWorkload
+
+jobspec_yaml = """
+version: 1
+resources:
+  one:
+    type: node
+    count: 1
+tasks:
+- name: a0
+  command: ["echo", "a"]
+  resources: one
+- name: a1
+  command: ["echo", "a"]
+  resources: one
+- name: a2
+  command: ["echo", "a"]
+  resources: one
+- name: x
+  command: ["echo", "b"]
+  resources: one
+- name: y
+  command: ["echo", "b"]
+  resources: one
+"""
+
+
+class Submitter:
+    """
+    A stand-in submitter that records jobspecs.
+    """
+
+    def __init__(self):
+        self.jobspecs = []
+        self.counter = itertools.count(1)
+
+    def submit(self, jobspec, waitable=False):
+        self.jobspecs.append(jobspec)
+        return str(next(self.counter))
+
+
+def test_coalesced_names(tmp_path):
+    """
+    Coalesced jobs are named for the range of names, or not named.
+    """
+    filename = tmp_path / "jobspec.yaml"
+    filename.write_text(jobspec_yaml)
+    submitter = Submitter()
+    FluxWorkload(submitter=submitter, coalesce=True).run(str(filename))
+
+    names = [js["attributes"]["system"].get("job", {}).get("name") for js in submitter.jobspecs]
+    assert names == ["a[0-2]"] * 3 + [None] * 2
@@ -0,0 +1,144 @@
+import itertools
+import json
+
+import pytest
+
+from jobspec.transformer.flux.workload import FluxWorkload
+
+resources = """
+version: 1
+resources:
+  one:
+    type: node
+    count: 1
+"""
+
+
+class Submitter:
+    """
+    Record jobspecs instead of submitting them, giving each the next id.
+    """
+
+    def __init__(self):
+        self.jobspecs = []
+        self.counter = itertools.count(1)
+
+    def submit(self, jobspec):
+        self.jobspecs.append(jobspec)
+        return str(next(self.counter))
+
+    @property
+    def names(self):
+        return [js["attributes"]["system"]["job"]["name"] for js in self.jobspecs]
+
+    def get_system(self, name):
+        return self.jobspecs[self.names.index(name)]["attributes"]["system"]
+
+
+def run(tmp_path, jobspec_yaml):
+    """
+    Run the jobspec, returning the submitter that recorded it.
+    """
+    filename = tmp_path / "jobspec.yaml"
+    filename.write_text(resources + jobspec_yaml)
+    submitter = Submitter()
+    FluxWorkload(submitter=submitter).run(str(filename))
+    return submitter
+
+
+def test_order(tmp_path):
+    """
+    A step is submitted after the step it depends on, and uses its id.
+    """
+    submitter = run(
+        tmp_path,
+        """
+tasks:
+- name: b
+  depends_on: ["a"]
+  command: ["echo", "b"]
+  resources: one
+- name: a
+  command: ["echo", "a"]
+  resources: one
+""",
+    )
+    assert submitter.names == ["a", "b"]
+    assert "dependencies" not in submitter.get_system("a")
+    assert submitter.get_system("b")["dependencies"] == [{"scheme": "afterok", "value": "1"}]
+
+
+def test_unknown_name(tmp_path):
+    """
+    A name that is not a step here is left for flux as a dependency name.
+    """
+    submitter = run(
+        tmp_path,
+        """
+tasks:
+- name: a
+  depends_on: ["elsewhere"]
+  command: ["echo", "a"]
+  resources: one
+""",
+    )
+    system = submitter.get_system("a")
+    assert "dependencies" not in system
+    assert system["dependency"] == {"name": "elsewhere"}
+
+
+@pytest.mark.parametrize(
+    "depends_on,error",
+    [({"a": "b", "b": "a"}, "cycle"), ({"a": "a", "b": "a"}, "itself")],
+    ids=["cycle", "self"],
+)
+def test_cycle(tmp_path, depends_on, error):
+    """
+    A dependency cycle is an error before anything is submitted.
+    """
+    tasks = "\ntasks:\n"
+    for name, after in depends_on.items():
+        tasks += f"- name: {name}\n  depends_on: [{after}]\n"
+        tasks += f"  command: [echo, {name}]\n  resources: one\n"
+    filename = tmp_path / "jobspec.yaml"
+    filename.write_text(resources + tasks)
+    submitter = Submitter()
+    with pytest.raises(ValueError, match=error):
+        FluxWorkload(submitter=submitter).run(str(filename))
+    assert submitter.jobspecs == []
+
+
+def test_batch_task_depends_on_top_level(tmp_path):
+    """
+    A batch with a task that depends on a step outside of it is submitted
+    after that step, and the task uses its id.
+    """
+    submitter = run(
+        tmp_path,
+        """
+groups:
+- name: group
+  resources: one
+  tasks:
+  - name: inner
+    depends_on: ["first"]
+    command: ["echo", "inner"]
+  - name: second
+    depends_on: ["inner"]
+    command: ["echo", "second"]
+tasks:
+- group: group
+- name: first
+  command: ["echo", "first"]
+  resources: one
+""",
+    )
+    assert submitter.names == ["first", "group"]
+
+    # The batch itself does not wait for the step, only the task in it
+    system = submitter.get_system("group")
+    assert "dependencies" not in system
+    script = system["files"]["batch-script"]["data"]
+    assert "--dependency=afterok:1" in script
+    assert "--dependency=afterok:${JOBID_INNER[0]}" in script
+    assert "dependency.name" not in script
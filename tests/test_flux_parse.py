@@ -0,0 +1,115 @@
+import copy
+
+import jobspec.core as js
+from jobspec.transformer.flux.workload import FluxWorkload
+
+jobspec_yaml = """
+version: 1
+requires:
+  io:
+  - name: fs
+    field: type
+    match: shared
+resources:
+  one:
+    type: node
+    count: 1
+groups:
+- name: outer
+  resources: one
+  attributes:
+    duration: 10
+  requires:
+    io:
+    - name: fs
+      field: type
+      match: local
+  tasks:
+  - name: first
+    command: ["echo", "first"]
+    attributes:
+      environment:
+        NAME: first
+    requires:
+      software:
+      - name: spack
+        field: type
+        match: package
+  - group: inner
+- name: inner
+  resources: one
+  tasks:
+  - name: second
+    command: ["echo", "second"]
+tasks:
+- name: top
+  command: ["echo", "top"]
+  resources: one
+  attributes:
+    cwd: /tmp
+"""
+
+
+def parse(tmp_path):
+    """
+    Parse the jobspec, returning it, a copy of the original data, and steps.
+
+    The parser accepts attributes and requires for groups (and requires for
+    tasks) that the schema does not yet, so we don't validate.
+    """
+    filename = tmp_path / "jobspec.yaml"
+    filename.write_text(jobspec_yaml)
+    jobspec = js.Jobspec(str(filename), validate=False)
+    original = copy.deepcopy(jobspec.data)
+    workload = FluxWorkload()
+    steps = workload.parse(jobspec)
+    return jobspec, original, {step.options["name"]: step for step in steps}
+
+
+def test_parse_does_not_change_jobspec(tmp_path):
+    """
+    Parsing and writing to step data never changes the jobspec (or its groups).
+    """
+    jobspec, original, steps = parse(tmp_path)
+    assert jobspec.data == original
+
+    outer = steps["outer"]
+    first, inner = outer.tasks
+    for step in [steps["top"], outer, first, inner, inner.tasks[0]]:
+        step.options["requires"].data["io"] = "changed"
+        step.options["requires"].data["new"] = "added"
+        attributes = step.options["attributes"]
+        if isinstance(attributes, js.Attributes):
+            attributes.data["cwd"] = "/changed"
+            attributes.data["new"] = "added"
+    assert jobspec.data == original
+
+
+def test_layered_requires(tmp_path):
+    """
+    Requires are layered on the parent, and attributes on the group.
+    """
+    _, original, steps = parse(tmp_path)
+    outer = steps["outer"]
+    first, inner = outer.tasks
+
+    assert outer.options["requires"].to_dict() == {"io": original["groups"][0]["requires"]["io"]}
+    assert first.options["requires"].to_dict() == {
+        "io": original["groups"][0]["requires"]["io"],
+        "software": original["groups"][0]["tasks"][0]["requires"]["software"],
+    }
+    assert first.options["attributes"].to_dict() == {
+        "duration": 10,
+        "environment": {"NAME": "first"},
+    }
+    assert steps["top"].options["requires"].to_dict() == {"io": original["requires"]["io"]}
+
+
+def test_group_attributes_not_inherited(tmp_path):
+    """
+    A group only has its own attributes, and not those of a parent group.
+    """
+    _, _, steps = parse(tmp_path)
+    _, inner = steps["outer"].tasks
+    assert inner.options["attributes"] == {}
+    assert inner.tasks[0].options["attributes"].to_dict() == {}
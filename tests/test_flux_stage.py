@@ -0,0 +1,91 @@
+import pytest
+
+import jobspec.utils as utils
+from jobspec.transformer.flux.steps import stage
+
+
+class Commands:
+    """
+    Record commands instead of running them, failing any with a word in fail.
+    """
+
+    def __init__(self, size=1, fail=None):
+        self.commands = []
+        self.size = size
+        self.fail = fail
+
+    def __call__(self, cmd, check_output=False, **kwargs):
+        self.commands.append((cmd, check_output))
+        if self.fail in cmd:
+            if check_output:
+                raise ValueError(f"{self.fail} failed")
+            return {"message": "", "return_code": 1}
+        if cmd[:2] == ["flux", "getattr"]:
+            return {"message": f"{self.size}\n", "return_code": 0}
+        return {"message": "", "return_code": 0}
+
+
+@pytest.fixture
+def commands(monkeypatch):
+    commands = Commands()
+    monkeypatch.setattr(utils, "run_command", commands)
+    return commands
+
+
+def get_tag(commands):
+    """
+    Get the filemap tag (the same for all phases).
+    """
+    tags = {cmd[cmd.index("--tags") + 1] for cmd, _ in commands.commands if "--tags" in cmd}
+    assert len(tags) == 1
+    return tags.pop()
+
+
+def test_stage(commands):
+    """
+    All files are staged under one tag, and each command is checked.
+    """
+    step = stage(None, filenames=["a.txt", "b.txt"])
+    result = step.run("/tmp/stage")
+    tag = get_tag(commands)
+    assert [cmd for cmd, _ in commands.commands] == [
+        ["flux", "exec", "-r", "all", "-x", "0", "mkdir", "-p", "/tmp/stage"],
+        ["flux", "filemap", "map", "--tags", tag, "--directory", "/tmp/stage", "a.txt", "b.txt"],
+        ["flux", "exec", "--dir", "/tmp/stage", "-r", "all", "-x", "0"]
+        + ["flux", "filemap", "get", "--tags", tag],
+        ["flux", "filemap", "unmap", "--tags", tag],
+    ]
+    assert all(check for _, check in commands.commands)
+    assert result.out == "staged 2 file(s) to /tmp/stage"
+
+
+def test_stage_fanout(commands):
+    """
+    With a fanout, files are staged to that many ranks at once.
+    """
+    commands.size = 10
+    step = stage(None, filename="a.txt", stage="/tmp/stage", settings={"fanout": 4})
+    step.run()
+    ranks = [cmd[cmd.index("-r") + 1] for cmd, _ in commands.commands if "get" in cmd]
+    assert ranks == ["0-3", "4-7", "8-9"]
+
+
+def test_stage_get_fails(commands):
+    """
+    A failed get is an error, and we still unmap.
+    """
+    commands.fail = "get"
+    step = stage(None, filename="a.txt")
+    with pytest.raises(ValueError):
+        step.run("/tmp/stage")
+    assert commands.commands[-1][0][:3] == ["flux", "filemap", "unmap"]
+
+
+def test_stage_directory_required(commands):
+    """
+    A stage directory is required, unless the filesystem is shared.
+    """
+    with pytest.raises(ValueError):
+        stage(None, filename="a.txt").run()
+    assert commands.commands == []
+    assert stage(None, filename="a.txt", settings={"sharedfs": True}).run() is None
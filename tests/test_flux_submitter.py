@@ -0,0 +1,135 @@
+import itertools
+import json
+import sys
+import threading
+import types
+
+import pytest
+
+from jobspec.transformer.flux.submitter import FluxSubmitter, format_jobid
+from jobspec.transformer.flux.workload import FluxWorkload
+
+jobspec_yaml = """
+version: 1
+resources:
+  one:
+    type: node
+    count: 1
+tasks:
+- name: a1
+  command: ["echo", "a1"]
+  resources: one
+- name: a2
+  command: ["echo", "a2"]
+  resources: one
+- name: a3
+  command: ["echo", "a3"]
+  resources: one
+- name: b
+  depends_on: ["a1"]
+  command: ["echo", "b"]
+  resources: one
+"""
+
+
+class Future:
+    def __init__(self, jobid):
+        self.jobid = jobid
+
+    def get_id(self):
+        if isinstance(self.jobid, Exception):
+            raise self.jobid
+        return self.jobid
+
+
+@pytest.fixture
+def flux_module(monkeypatch):
+    """
+    A stand-in for the flux python bindings that records jobspecs.
+    """
+    counter = itertools.count(1)
+    submitted = []
+
+    def submit(handle, jobspec, waitable=False):
+        submitted.append(json.loads(jobspec))
+        return next(counter)
+
+    def submit_async(handle, jobspec, waitable=False):
+        jobid = submit(handle, jobspec, waitable)
+        if "error" in submitted[-1]:
+            jobid = ValueError(submitted[-1]["error"])
+        return Future(jobid)
+
+    flux = types.ModuleType("flux")
+    flux.Flux = object
+    flux.job = types.ModuleType("flux.job")
+    flux.job.submit = submit
+    flux.job.submit_async = submit_async
+    monkeypatch.setitem(sys.modules, "flux", flux)
+    monkeypatch.setitem(sys.modules, "flux.job", flux.job)
+    return submitted
+
+
+def test_bulk_and_dependent_steps(tmp_path, flux_module):
+    """
+    Steps submitted in bulk don't block a dependent step after them.
+    """
+    filename = tmp_path / "jobspec.yaml"
+    filename.write_text(jobspec_yaml)
+    workload = FluxWorkload(submitter=FluxSubmitter(handle=object()))
+
+    thread = threading.Thread(target=workload.run, args=(str(filename),), daemon=True)
+    thread.start()
+    thread.join(timeout=30)
+    assert not thread.is_alive()
+
+    names = [js["attributes"]["system"]["job"]["name"] for js in flux_module]
+    assert names == ["a1", "a2", "a3", "b"]
+    dependencies = flux_module[-1]["attributes"]["system"]["dependencies"]
+    assert dependencies == [{"scheme": "afterok", "value": "1"}]
+
+
+def test_submit_many_holds_lock(flux_module, monkeypatch):
+    """
+    The lock is held until all job ids are read, since that uses the handle.
+    """
+    submitter = FluxSubmitter(handle=object())
+    get_id = Future.get_id
+    locked = []
+
+    def check_lock(future):
+        locked.append(submitter.lock.locked())
+        return get_id(future)
+
+    monkeypatch.setattr(Future, "get_id", check_lock)
+    jobids = submitter.submit_many([{"a": 1}, {"b": 2}])
+    assert locked == [True, True]
+    assert not submitter.lock.locked()
+    assert submitter.submit({"c": 3}) == "3"
+    assert list(jobids) == ["1", "2"]
+
+
+def test_submit_many_error(flux_module):
+    """
+    A failed submit raises when we get to its id, and not before.
+    """
+    submitter = FluxSubmitter(handle=object())
+    jobids = submitter.submit_many([{"a": 1}, {"error": "bad jobspec"}, {"c": 3}])
+    assert next(jobids) == "1"
+    with pytest.raises(ValueError, match="bad jobspec"):
+        next(jobids)
+    assert len(flux_module) == 3
+
+
+class JobID(int):
+    @property
+    def f58(self):
+        return f"f{int(self)}"
+
+
+@pytest.mark.parametrize("jobid,expected", [(JobID(7), "f7"), (7, "7"), ("f7", "f7")])
+def test_format_jobid(jobid, expected):
+    """
+    A JobID is formatted as f58, and anything else as a string.
+    """
+    assert format_jobid(jobid) == expected
@@ -0,0 +1,52 @@
+import json
+
+from jobspec.subsystem.graph import GraphRegistry
+from jobspec.subsystem.subsystem import Subsystem
+
+
+def write_subsystem(path, name, packages):
+    """
+    Write a subsystem graph with a root and a node for each package.
+    """
+    nodes = {f"{name}0": {"metadata": {"type": name, "basename": name, "name": name, "id": 0}}}
+    edges = []
+    for i, package in enumerate(packages, start=1):
+        nodes[f"package{i}"] = {
+            "metadata": {
+                "type": "package",
+                "basename": "package",
+                "name": f"package{i}",
+                "id": i,
+                "attributes": {"name": package, "shared": "yes"},
+            }
+        }
+        edges.append({"source": f"{name}0", "target": f"package{i}"})
+    filename = path / f"{name}.json"
+    filename.write_text(json.dumps({"graph": {"nodes": nodes, "edges": edges}}))
+    return filename
+
+
+def test_remove_subsystem(tmp_path):
+    """
+    A removed subsystem is gone from every index, and can be loaded again.
+    """
+    spack = write_subsystem(tmp_path, "spack", ["lammps", "hdf5"])
+    write_subsystem(tmp_path, "modules", ["python", "hdf5"])
+    registry = GraphRegistry(str(tmp_path))
+    assert registry.has_node_attribute("spack", "package", "name", "lammps")
+
+    registry.remove_subsystem("spack")
+    assert not registry.has_subsystem("spack")
+    assert not registry.has_node_type("spack", "package")
+    assert not registry.has_attribute("name", "lammps")
+    assert not registry.has_node_attribute("spack", "package", "name", "hdf5")
+    assert registry.has_node_attribute("modules", "package", "name", "hdf5")
+    assert len(registry.attributes[("shared", "yes")]) == 2
+    assert set(registry.descendants("modules", "modules0")) == {
+        ("modules", "package1"),
+        ("modules", "package2"),
+    }
+
+    registry.load_subsystem(Subsystem(str(spack)))
+    assert registry.has_node_attribute("spack", "package", "name", "lammps")
+    assert registry.contains("spack", "spack0", "package1")
@@ -0,0 +1,84 @@
+import json
+import random
+
+import pytest
+
+from jobspec.subsystem.jgf import JGFReader
+
+
+def random_value(rng, depth=0):
+    """
+    Generate a random json value, including numbers that are easy to cut.
+    """
+    choices = ["int", "float", "exp", "string", "bool", "null"]
+    if depth < 3:
+        choices += ["list", "dict"]
+    kind = rng.choice(choices)
+    if kind == "int":
+        return rng.randint(-100000, 100000)
+    if kind == "float":
+        return round(rng.uniform(-10000, 10000), rng.randint(1, 6))
+    if kind == "exp":
+        return rng.uniform(-1, 1) * 10 ** rng.randint(-30, 30)
+    if kind == "string":
+        return "".join(rng.choice('ab \\"\n{}[],:é.') for _ in range(rng.randint(0, 8)))
+    if kind == "bool":
+        return rng.choice([True, False])
+    if kind == "null":
+        return None
+    if kind == "list":
+        return [random_value(rng, depth + 1) for _ in range(rng.randint(0, 4))]
+    return {f"k{i}": random_value(rng, depth + 1) for i in range(rng.randint(0, 4))}
+
+
+def random_graph(rng):
+    """
+    Generate a random JGF graph, with sections before and after the nodes.
+    """
+    nodes = {}
+    for i in range(rng.randint(0, 6)):
+        nodes[str(i)] = {
+            "label": str(i),
+            "metadata": {"type": "thing", "value": random_value(rng), "size": 1234.5},
+        }
+    edges = [
+        {"source": str(i), "target": str(i + 1), "weight": random_value(rng)}
+        for i in range(rng.randint(0, 6))
+    ]
+    graph = {"metadata": random_value(rng), "nodes": nodes, "edges": edges}
+    return {"version": random_value(rng), "graph": graph, "extra": random_value(rng)}
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_small_chunks(tmp_path, seed):
+    """
+    Reading with small chunks gives the same nodes and edges as json.load.
+    """
+    rng = random.Random(seed)
+    graph = random_graph(rng)
+    filename = tmp_path / "graph.json"
+    indent = rng.choice([None, 1, 4])
+    filename.write_text(json.dumps(graph, indent=indent, ensure_ascii=rng.random() < 0.5))
+
+    for chunk_size in [1, 2, 3, 5, 7, 9, 21, 64]:
+        reader = JGFReader(str(filename), chunk_size=chunk_size)
+        assert dict(reader.iter_nodes()) == graph["graph"]["nodes"]
+        assert list(reader.iter_edges()) == graph["graph"]["edges"]
+
+
+@pytest.mark.parametrize("chunk_size", range(1, 32))
+def test_float_at_chunk_boundary(tmp_path, chunk_size):
+    """
+    A float cut after its point or exponent is read in full.
+    """
+    graph = {
+        "graph": {
+            "nodes": {"0": {"metadata": {"size": 1234.5, "exp": 1e5, "neg": -2.5e-3}}},
+            "edges": [{"source": "0", "target": "0"}],
+        }
+    }
+    filename = tmp_path / "graph.json"
+    filename.write_text(json.dumps(graph))
+    reader = JGFReader(str(filename), chunk_size=chunk_size)
+    assert dict(reader.iter_nodes()) == graph["graph"]["nodes"]
+    assert list(reader.iter_edges()) == graph["graph"]["edges"]
@@ -0,0 +1,134 @@
+import copy
+import os
+import pickle
+
+import jsonschema
+import pytest
+
+import jobspec.core as js
+import jobspec.schema as schema
+from jobspec.core.cache import JobspecCache, get_schema_digest
+
+jobspec_yaml = """
+version: 1
+resources:
+  one:
+    type: node
+    count: 1
+tasks:
+- name: echo
+  command: ["echo", "hello"]
+  resources: one
+"""
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return JobspecCache(str(tmp_path / "cache"))
+
+
+def get_entries(cache):
+    return sorted(os.listdir(cache.path))
+
+
+def test_get_and_set(cache):
+    """
+    A miss returns None, and what we set is returned for the same content.
+    """
+    assert cache.get(jobspec_yaml, schema.jobspec_nextgen) is None
+    cache.set(jobspec_yaml, schema.jobspec_nextgen, {"version": 1})
+    assert cache.get(jobspec_yaml, schema.jobspec_nextgen) == {"version": 1}
+    assert cache.get(jobspec_yaml + "\n", schema.jobspec_nextgen) is None
+    assert len(get_entries(cache)) == 1
+
+
+def test_schema_change(cache):
+    """
+    A change to the schema is a miss, even for the same content.
+    """
+    changed = copy.deepcopy(schema.jobspec_nextgen)
+    changed["title"] = "changed"
+    assert get_schema_digest(changed) != get_schema_digest(schema.jobspec_nextgen)
+
+    cache.set(jobspec_yaml, schema.jobspec_nextgen, {"version": 1})
+    assert cache.get(jobspec_yaml, changed) is None
+    cache.set(jobspec_yaml, changed, {"version": 2})
+    assert cache.get(jobspec_yaml, schema.jobspec_nextgen) == {"version": 1}
+    assert cache.get(jobspec_yaml, changed) == {"version": 2}
+
+
+def test_broken_entry(cache):
+    """
+    An entry that cannot be read is a miss.
+    """
+    filename = cache.get_filename(jobspec_yaml, schema.jobspec_nextgen)
+    with open(filename, "wb") as fd:
+        fd.write(b"not a pickle")
+    assert cache.get(jobspec_yaml, schema.jobspec_nextgen) is None
+
+
+def test_failed_write(cache, monkeypatch):
+    """
+    A write that fails leaves no entry, and no temporary file.
+    """
+
+    def dump(data, handle, **kwargs):
+        handle.write(b"partial")
+        raise OSError("disk is full")
+
+    monkeypatch.setattr(pickle, "dump", dump)
+    with pytest.raises(OSError):
+        cache.set(jobspec_yaml, schema.jobspec_nextgen, {"version": 1})
+    assert get_entries(cache) == []
+
+
+def test_prune(cache):
+    """
+    The least recently used entries are removed when the cache is too big.
+    """
+    contents = [jobspec_yaml.replace("hello", str(i)) for i in range(3)]
+    for i, content in enumerate(contents):
+        cache.set(content, schema.jobspec_nextgen, {"data": "x" * 1000})
+        filename = cache.get_filename(content, schema.jobspec_nextgen)
+        os.utime(filename, (i, i))
+    size = os.path.getsize(filename)
+
+    # Reading an entry makes it the most recently used
+    assert cache.get(contents[0], schema.jobspec_nextgen) is not None
+    cache.max_size = size * 2
+    cache.prune()
+    assert cache.get(contents[1], schema.jobspec_nextgen) is None
+    assert cache.get(contents[0], schema.jobspec_nextgen) is not None
+    assert cache.get(contents[2], schema.jobspec_nextgen) is not None
+
+    cache.clear()
+    assert get_entries(cache) == []
+
+
+def test_jobspec_cache(tmp_path, cache, monkeypatch):
+    """
+    A valid jobspec file is saved, and then loaded without parsing.
+    """
+    filename = tmp_path / "jobspec.yaml"
+    filename.write_text(jobspec_yaml)
+    first = js.Jobspec(str(filename), cache=cache)
+    assert len(get_entries(cache)) == 1
+
+    def load(self, filename):
+        raise AssertionError("The jobspec should be loaded from the cache")
+
+    monkeypatch.setattr(js.Jobspec, "load", load)
+    second = js.Jobspec(str(filename), cache=cache)
+    assert second.data == first.data
+    assert second.filename == str(filename)
+
+
+def test_jobspec_cache_invalid(tmp_path, cache):
+    """
+    A jobspec that is not valid is not saved.
+    """
+    filename = tmp_path / "jobspec.yaml"
+    filename.write_text(jobspec_yaml.replace("version: 1", "version: one"))
+    with pytest.raises(jsonschema.ValidationError):
+        js.Jobspec(str(filename), cache=cache)
+    assert get_entries(cache) == []
@@ -0,0 +1,74 @@
+import os
+
+import jobspec.core as js
+
+here = os.path.dirname(os.path.abspath(__file__))
+hello_world = os.path.join(os.path.dirname(here), "examples", "hello-world-jobspec.yaml")
+
+jobspec_yaml = """
+version: 1
+resources:
+  one:
+    type: node
+    count: 1
+tasks:
+- name: echo
+  command: ["echo", "hello"]
+  resources: one
+"""
+
+
+def load_many(items, **kwargs):
+    """
+    Load jobspecs, returning (jobspec, error) for each item.
+    """
+    results = {}
+    for item, jobspec, error in js.Jobspec.load_many(items, workers=2, **kwargs):
+        results[str(item)] = (jobspec, error)
+    return results
+
+
+def test_load_many():
+    """
+    Filenames, strings, and dicts are loaded and validated.
+    """
+    data = js.Jobspec(jobspec_yaml).data
+    results = load_many([hello_world, jobspec_yaml, data])
+    assert len(results) == 3
+    for jobspec, error in results.values():
+        assert error is None
+        assert isinstance(jobspec, js.Jobspec)
+
+    jobspec, _ = results[hello_world]
+    assert jobspec.filename == hello_world
+    assert [task["name"] for task in jobspec.data["tasks"]] == ["task-1", "task-2"]
+    assert results[jobspec_yaml][0].data == data
+
+
+def test_load_many_errors(tmp_path):
+    """
+    A jobspec that cannot be loaded has an error, and the rest are loaded.
+    """
+    missing_command = jobspec_yaml.replace('command: ["echo", "hello"]', "")
+    invalid = jobspec_yaml.replace("version: 1", "version: one")
+    results = load_many([jobspec_yaml, missing_command, invalid])
+
+    jobspec, error = results[jobspec_yaml]
+    assert error is None and jobspec is not None
+    jobspec, error = results[missing_command]
+    assert jobspec is None
+    assert isinstance(error, ValueError)
+    assert "must have a command or steps" in str(error)
+    jobspec, error = results[invalid]
+    assert jobspec is None
+    assert isinstance(error, ValueError)
+
+
+def test_load_many_without_validate():
+    """
+    Without validation, a jobspec that does not match the schema is loaded.
+    """
+    invalid = jobspec_yaml.replace("version: 1", "version: one")
+    jobspec, error = load_many([invalid], validate=False)[invalid]
+    assert error is None
+    assert jobspec.data["version"] == "one"
@@ -0,0 +1,154 @@
+import copy
+import sys
+
+import pytest
+
+import jobspec.core as js
+from jobspec.core.resources import find_resources, to_jobspec
+
+# A node with sockets, and a slot with cores (with threads) and a gpu
+nested = {
+    "type": "node",
+    "count": 4,
+    "requires": [{"name": "system", "field": "cpu.target", "value": "amd64"}],
+    "with": [
+        {
+            "type": "socket",
+            "replicas": 2,
+            "with": [
+                {"type": "core", "count": 8, "with": [{"type": "pu", "count": 2}]},
+                {"type": "gpu"},
+            ],
+        }
+    ],
+}
+
+
+def deep_tree(depth):
+    """
+    A tree with one resource at each level, deeper than the recursion limit.
+    """
+    tree = {"type": "level0", "count": 1}
+    resource = tree
+    for i in range(1, depth):
+        resource["with"] = [{"type": f"level{i}", "count": 1}]
+        resource = resource["with"][0]
+    return tree
+
+
+@pytest.mark.parametrize(
+    "resource,expected",
+    [
+        ({"type": "node", "count": 1}, {"node": 1}),
+        # Below the slot, only the resources directly in it are counted
+        (
+            {
+                "type": "node",
+                "count": 4,
+                "with": [
+                    {
+                        "type": "slot",
+                        "replicas": 1,
+                        "with": [
+                            {"type": "core", "count": 8, "with": [{"type": "pu", "count": 2}]},
+                            {"type": "gpu", "count": 1},
+                        ],
+                    }
+                ],
+            },
+            {"node": 4, "core": 8, "gpu": 1},
+        ),
+        (
+            {"type": "node", "count": 1, "with": [{"type": "core", "count": 2}]},
+            {"node": 1, "core": 2},
+        ),
+        # A later count for the same type wins
+        (
+            {
+                "type": "node",
+                "count": 1,
+                "with": [
+                    {"type": "socket", "count": 2, "with": [{"type": "core", "count": 2}]},
+                    {"type": "core", "count": 6},
+                ],
+            },
+            {"node": 1, "socket": 2, "core": 6},
+        ),
+        # Replicas are a count for a resource that is not a slot
+        ({"type": "node", "replicas": 3}, {"node": 3}),
+    ],
+    ids=["node", "slot", "nested", "later-wins", "replicas"],
+)
+def test_find_resources(resource, expected):
+    assert find_resources({}, resource, None) == expected
+
+
+def test_find_resources_missing_count():
+    with pytest.raises(ValueError):
+        find_resources({}, {"type": "node", "with": [{"type": "core"}]}, None)
+
+
+def test_to_jobspec():
+    """
+    A slot is added for replicas, and fields flux does not understand are removed.
+    """
+    original = copy.deepcopy(nested)
+    jobspec, has_slot = to_jobspec(nested, slot_name="task")
+    assert has_slot
+    assert jobspec == {
+        "type": "node",
+        "count": 4,
+        "with": [
+            {
+                "type": "socket",
+                "count": 1,
+                "with": [
+                    {
+                        "type": "slot",
+                        "count": 2,
+                        "label": "task",
+                        "with": [
+                            {"type": "core", "count": 8, "with": [{"type": "pu", "count": 2}]},
+                            {"type": "gpu", "count": 1},
+                        ],
+                    }
+                ],
+            }
+        ],
+    }
+    assert nested == original
+
+
+def test_resources_to_jobspec():
+    """
+    Without a slot, one is added at the top.
+    """
+    resources = js.Resources({"type": "node", "count": 2})
+    assert resources.to_jobspec(None) == {
+        "type": "slot",
+        "count": 1,
+        "label": "default",
+        "with": [{"type": "node", "count": 2}],
+    }
+    resources = js.Resources(nested, slot={"label": "task"})
+    assert resources.to_jobspec(None)["with"][0]["with"][0]["label"] == "task"
+
+
+def test_deep_tree():
+    """
+    A tree deeper than the recursion limit can be flattened and converted.
+    """
+    depth = sys.getrecursionlimit() + 100
+    tree = deep_tree(depth)
+    flat = find_resources({}, tree, None)
+    assert len(flat) == depth
+
+    jobspec, has_slot = to_jobspec(tree)
+    assert not has_slot
+    levels = 0
+    resource = jobspec
+    while resource is not None:
+        assert (resource["type"], resource["count"]) == (f"level{levels}", 1)
+        levels += 1
+        resource = (resource.get("with") or [None])[0]
+    assert levels == depth
@@ -0,0 +1,79 @@
+import copy
+
+import pytest
+
+import jobspec.core as js
+
+
+@pytest.mark.parametrize("cls", [js.Resources, js.Attributes, js.Requires])
+def test_slots(cls):
+    """
+    Wrappers don't have an instance dict, so an unknown attribute is an error.
+    """
+    wrapper = cls({"a": 1})
+    assert not hasattr(wrapper, "__dict__")
+    with pytest.raises(AttributeError):
+        wrapper.unknown = True
+
+
+def test_update():
+    """
+    Data that is not shared is updated in place, and update returns self.
+    """
+    data = {"duration": 10}
+    attributes = js.Attributes(data)
+    assert attributes.update({"cwd": "/tmp"}) is attributes
+    assert attributes.update(None) is attributes
+    assert data == {"duration": 10, "cwd": "/tmp"}
+
+
+def test_shared_update():
+    """
+    Shared data is layered on, and never changed by an update or a write.
+    """
+    parent = {"duration": 10, "environment": {"A": "1"}}
+    original = copy.deepcopy(parent)
+    attributes = js.Attributes(parent, shared=True).update({"duration": 20})
+    assert attributes.to_dict() == {"duration": 20, "environment": {"A": "1"}}
+
+    attributes.data["cwd"] = "/tmp"
+    attributes.update({"duration": 30})
+    assert attributes.get("duration") == 30
+    assert attributes.get("cwd") == "/tmp"
+    assert parent == original
+
+    # Another wrapper on the same parent sees none of it
+    assert js.Attributes(parent, shared=True).to_dict() == original
+
+
+def test_shared_write_wins():
+    """
+    A write is on top of an update that comes after it.
+    """
+    attributes = js.Attributes({}, shared=True)
+    attributes.data["cwd"] = "/written"
+    attributes.update({"cwd": "/updated"})
+    assert attributes.get("cwd") == "/written"
+
+
+def test_requires_update():
+    """
+    Requires are updated at the level of fields in a group, without changing the parent.
+    """
+    parent = {"io": {"fieldA": "valueA", "fieldB": "valueB"}, "software": {"name": "spack"}}
+    original = copy.deepcopy(parent)
+    requires = js.Requires(parent, shared=True)
+    requires.update({"io": {"fieldB": "valueC"}, "network": {"type": "ib"}})
+    assert requires.to_dict() == {
+        "io": {"fieldA": "valueA", "fieldB": "valueC"},
+        "software": {"name": "spack"},
+        "network": {"type": "ib"},
+    }
+
+    requires.data["io"]["fieldA"] = "changed"
+    assert requires.get("io")["fieldA"] == "changed"
+    assert parent == original
+
+    # A string is a reference to a group we already have
+    assert requires.update("io") is requires
+    assert requires.get("io")["fieldB"] == "valueC"
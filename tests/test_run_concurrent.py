@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+
+from jobspec.runner import TransformerBase
+
+
+class Transformer(TransformerBase):
+    name = "test"
+
+
+class Step:
+    """
+    A step that records when it runs, and can wait or fail.
+    """
+
+    name = "submit"
+
+    def __init__(self, name, after=None, sleep=0, fail=False):
+        self.options = {"name": name}
+        self.after = after or []
+        self.sleep = sleep
+        self.fail = fail
+        self.started = None
+        self.ended = None
+
+    def run(self, record=None, **kwargs):
+        self.started = time.monotonic()
+        record.start(self)
+        time.sleep(self.sleep)
+        record.end(self)
+        self.ended = time.monotonic()
+        if self.fail:
+            raise ValueError(f"{self.options['name']} failed")
+
+
+class Record:
+    """
+    Record the order steps start, and how many run at once.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.most = 0
+        self.started = []
+
+    def start(self, step):
+        with self.lock:
+            self.started.append(step.options["name"])
+            self.running += 1
+            self.most = max(self.most, self.running)
+
+    def end(self, step):
+        with self.lock:
+            self.running -= 1
+
+
+def run(steps, workers):
+    record = Record()
+    transformer = Transformer(workers=workers, step_options={"record": record})
+    transformer.run_steps(steps)
+    return record
+
+
+def test_in_flight_limit():
+    """
+    No more than the number of workers run at once.
+    """
+    steps = [Step(str(i), sleep=0.05) for i in range(6)]
+    record = run(steps, workers=2)
+    assert record.most == 2
+    assert sorted(record.started) == [str(i) for i in range(6)]
+
+
+def test_serial():
+    """
+    Without more than one worker, steps run one at a time and in order.
+    """
+    steps = [Step(str(i)) for i in range(3)]
+    record = run(steps, workers=None)
+    assert record.most == 1
+    assert record.started == ["0", "1", "2"]
+
+
+def test_depends_on():
+    """
+    A step starts after the step it depends on is done, and others don't wait.
+    """
+    first = Step("first", sleep=0.1)
+    second = Step("second", after=["first"])
+    other = Step("other")
+    record = run([first, second, other], workers=4)
+    assert second.started >= first.ended
+    assert other.started < first.ended
+    assert record.started.index("other") < record.started.index("second")
+
+
+def test_failed_dependency():
+    """
+    A failed step ends the run, and a step that depends on it does not run.
+    """
+    first = Step("first", fail=True)
+    second = Step("second", after=["first"])
+    with pytest.raises(SystemExit):
+        run([first, second], workers=2)
+    assert second.started is None
@@ -0,0 +1,144 @@
+import json
+import os
+
+import pytest
+
+from jobspec.subsystem.subsystem import SubsystemRegistry
+
+
+def write_subsystem(path, name, packages, filename=None):
+    """
+    Write a subsystem graph with a root and a node for each package.
+    """
+    nodes = {f"{name}0": {"metadata": {"type": name, "basename": name, "name": name, "id": 0}}}
+    for i, package in enumerate(packages, start=1):
+        nodes[f"package{i}"] = {
+            "metadata": {
+                "type": "package",
+                "basename": "package",
+                "name": f"package{i}",
+                "id": i,
+                "attributes": {"name": package},
+            }
+        }
+    filename = path / (filename or f"{name}.json")
+    filename.write_text(json.dumps({"graph": {"nodes": nodes, "edges": []}}))
+    return filename
+
+
+@pytest.fixture
+def loaded(monkeypatch):
+    """
+    Record the subsystems that are loaded into the database.
+    """
+    names = []
+    load_subsystem = SubsystemRegistry.load_subsystem
+
+    def record(self, subsystem):
+        names.append(subsystem.name)
+        return load_subsystem(self, subsystem)
+
+    monkeypatch.setattr(SubsystemRegistry, "load_subsystem", record)
+    return names
+
+
+@pytest.fixture
+def subsystems(tmp_path):
+    path = tmp_path / "subsystems"
+    path.mkdir()
+    write_subsystem(path, "spack", ["lammps", "hdf5"])
+    write_subsystem(path, "modules", ["python"])
+    return path
+
+
+def open_registry(tmp_path, subsystems):
+    return SubsystemRegistry(str(subsystems), database=str(tmp_path / "subsystems.db"))
+
+
+def get_files(registry):
+    return {
+        os.path.basename(path): subsystem
+        for path, subsystem in registry.query("SELECT path, subsystem FROM files;")
+    }
+
+
+def test_cold_and_warm_load(tmp_path, subsystems, loaded):
+    """
+    Subsystems are loaded once, and not again when nothing changed.
+    """
+    registry = open_registry(tmp_path, subsystems)
+    assert sorted(loaded) == ["modules", "spack"]
+    assert get_files(registry) == {"modules.json": "modules", "spack.json": "spack"}
+    assert registry.has_node_attribute("spack", "package", "name", "lammps")
+    registry.close()
+
+    loaded.clear()
+    registry = open_registry(tmp_path, subsystems)
+    assert loaded == []
+    assert registry.has_node_attribute("spack", "package", "name", "lammps")
+    registry.close()
+
+
+def test_touch_without_change(tmp_path, subsystems, loaded):
+    """
+    A file with a new modified time and the same content is not loaded again.
+    """
+    open_registry(tmp_path, subsystems).close()
+    filename = subsystems / "spack.json"
+    st = os.stat(filename)
+    os.utime(filename, (st.st_atime, st.st_mtime + 10))
+
+    loaded.clear()
+    registry = open_registry(tmp_path, subsystems)
+    assert loaded == []
+    mtime = registry.query("SELECT mtime FROM files WHERE subsystem = 'spack';")[0][0]
+    assert mtime == st.st_mtime + 10
+    registry.close()
+
+
+def test_content_change(tmp_path, subsystems, loaded):
+    """
+    A file with new content replaces the subsystem.
+    """
+    open_registry(tmp_path, subsystems).close()
+    write_subsystem(subsystems, "spack", ["openssl"])
+
+    loaded.clear()
+    registry = open_registry(tmp_path, subsystems)
+    assert loaded == ["spack"]
+    assert registry.has_node_attribute("spack", "package", "name", "openssl")
+    assert not registry.has_attribute("name", "lammps")
+    assert registry.has_node_attribute("modules", "package", "name", "python")
+    registry.close()
+
+
+def test_deleted_file(tmp_path, subsystems, loaded):
+    """
+    A file that was deleted removes its subsystem.
+    """
+    open_registry(tmp_path, subsystems).close()
+    os.remove(subsystems / "spack.json")
+
+    loaded.clear()
+    registry = open_registry(tmp_path, subsystems)
+    assert loaded == []
+    assert not registry.has_subsystem("spack")
+    assert not registry.has_attribute("name", "lammps")
+    assert get_files(registry) == {"modules.json": "modules"}
+    registry.close()
+
+
+def test_moved_file(tmp_path, subsystems, loaded):
+    """
+    A subsystem moved to a new file is removed before the new file is loaded.
+    """
+    open_registry(tmp_path, subsystems).close()
+    os.remove(subsystems / "spack.json")
+    write_subsystem(subsystems, "spack", ["lammps", "openssl"], filename="spack-new.json")
+
+    loaded.clear()
+    registry = open_registry(tmp_path, subsystems)
+    assert loaded == ["spack"]
+    assert registry.has_node_attribute("spack", "package", "name", "openssl")
+    assert get_files(registry) == {"modules.json": "modules", "spack-new.json": "spack"}
+    registry.close()
@@ -0,0 +1,73 @@
+import os
+
+import pytest
+
+import jobspec.subsystem.queries as queries
+from jobspec.subsystem.subsystem import SubsystemRegistry
+
+here = os.path.dirname(os.path.abspath(__file__))
+subsystem_dir = os.path.join(os.path.dirname(here), "examples", "subsystems")
+
+
+@pytest.fixture
+def registry():
+    registry = SubsystemRegistry(subsystem_dir)
+    yield registry
+    registry.close()
+
+
+def get_plan(registry, statement, params=()):
+    """
+    Get the details of each step of the query plan for a statement.
+    """
+    rows = registry.conn.execute(f"EXPLAIN QUERY PLAN {statement}", params).fetchall()
+    return [row[3] for row in rows]
+
+
+def assert_searches(plan, table, index=None):
+    """
+    Assert that a table is searched with an index (and never scanned).
+    """
+    assert not [x for x in plan if x.startswith(f"SCAN {table}")], plan
+    searches = [x for x in plan if x.startswith(f"SEARCH {table} ")]
+    assert searches, plan
+    assert all("INDEX" in x for x in searches), plan
+    if index is not None:
+        assert any(f"INDEX {index} " in x for x in searches), plan
+
+
+def test_node_type_exists(registry):
+    plan = get_plan(registry, queries.node_type_exists_sql, ("spack", "package"))
+    assert_searches(plan, "nodes", "nodes_subsystem_type")
+
+
+def test_attribute_exists(registry):
+    plan = get_plan(registry, queries.attribute_exists_sql, ("name", "lammps"))
+    assert_searches(plan, "attributes", "attributes_name_value")
+
+
+def test_node_attribute_exists(registry):
+    params = ("spack", "package", "name", "lammps")
+    plan = get_plan(registry, queries.node_attribute_exists_sql, params)
+    assert_searches(plan, "nodes")
+    assert_searches(plan, "attributes")
+
+
+def test_remove_subsystem(registry):
+    """
+    Each delete for a subsystem finds its rows with an index.
+    """
+    statements = []
+    registry.conn.set_trace_callback(statements.append)
+    registry.remove_subsystem("environment-modules")
+    registry.conn.set_trace_callback(None)
+
+    deletes = {}
+    for statement in statements:
+        if statement.startswith("DELETE FROM "):
+            deletes[statement.split()[2]] = statement
+    assert sorted(deletes) == ["attributes", "nodes", "subsystems"]
+
+    assert_searches(get_plan(registry, deletes["attributes"]), "attributes")
+    assert_searches(get_plan(registry, deletes["nodes"]), "nodes")
+    assert_searches(get_plan(registry, deletes["subsystems"]), "subsystems")
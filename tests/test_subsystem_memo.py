@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from jobspec.subsystem.graph import GraphRegistry
+from jobspec.subsystem.subsystem import Subsystem, SubsystemRegistry
+
+
+def write_subsystem(path, name, packages):
+    """
+    Write a subsystem graph with a root and a node for each package.
+    """
+    nodes = {f"{name}0": {"metadata": {"type": name, "basename": name, "name": name, "id": 0}}}
+    for i, package in enumerate(packages, start=1):
+        nodes[f"package{i}"] = {
+            "metadata": {
+                "type": "package",
+                "basename": "package",
+                "name": f"package{i}",
+                "id": i,
+                "attributes": {"name": package},
+            }
+        }
+    filename = path / f"{name}.json"
+    filename.write_text(json.dumps({"graph": {"nodes": nodes, "edges": []}}))
+    return filename
+
+
+def get_item(package):
+    return {
+        "name": "spack",
+        "field": "type",
+        "match": "package",
+        "attribute": "name",
+        "value": package,
+    }
+
+
+@pytest.fixture(params=[SubsystemRegistry, GraphRegistry], ids=["sqlite", "graph"])
+def registry(request, tmp_path):
+    write_subsystem(tmp_path, "spack", ["lammps"])
+    return request.param(str(tmp_path))
+
+
+def test_memo(registry, monkeypatch):
+    """
+    The same item is only checked once, with hits and misses counted.
+    """
+    checked = []
+    item_satisfied = type(registry).item_satisfied
+
+    def record(self, item, ignore_missing=True):
+        checked.append(item["value"])
+        return item_satisfied(self, item, ignore_missing)
+
+    monkeypatch.setattr(type(registry), "item_satisfied", record)
+    assert registry.memo_item_satisfied(get_item("lammps"))
+    assert registry.memo_item_satisfied(dict(reversed(get_item("lammps").items())))
+    assert not registry.memo_item_satisfied(get_item("hdf5"))
+    assert not registry.memo_item_satisfied(get_item("hdf5"))
+    assert checked == ["lammps", "hdf5"]
+    assert registry.memo_stats() == {"hits": 2, "misses": 2, "size": 2}
+
+    # ignore_missing can change the answer, so it is part of the key
+    registry.memo_item_satisfied(get_item("lammps"), ignore_missing=False)
+    assert checked == ["lammps", "hdf5", "lammps"]
+
+
+def test_memo_cleared(registry, tmp_path):
+    """
+    Loading or removing a subsystem clears what we remembered.
+    """
+    assert not registry.memo_item_satisfied(get_item("hdf5"))
+    registry.remove_subsystem("spack")
+    assert registry.memo_stats()["size"] == 0
+
+    registry.load_subsystem(Subsystem(str(write_subsystem(tmp_path, "spack", ["hdf5"]))))
+    assert registry.memo_item_satisfied(get_item("hdf5"))
+    assert not registry.memo_item_satisfied(get_item("lammps"))
+
+
+def test_satisfied_many(registry):
+    """
+    Requirement items shared by jobspecs are checked once.
+    """
+    jobspecs = []
+    for package in ["lammps", "lammps", "hdf5"]:
+        jobspecs.append(
+            {
+                "version": 1,
+                "requires": {"software": [get_item(package)]},
+                "resources": {"one": {"type": "node", "count": 1}},
+                "tasks": [{"name": package, "command": ["echo"], "resources": "one"}],
+            }
+        )
+    results = list(registry.satisfied_many(jobspecs))
+    assert [result["satisfied"] for result in results] == [True, True, False]
+    assert results[2]["unsatisfied"] == {"group": "software", "item": get_item("hdf5")}
+    assert registry.memo_stats() == {"hits": 1, "misses": 2, "size": 2}
@@ -0,0 +1,100 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+from jobspec.subsystem.subsystem import SubsystemRegistry
+
+
+def write_subsystem(path, name, packages, filename=None):
+    """
+    Write a subsystem graph with metadata and edge fields the registry does not use.
+    """
+    nodes = {
+        f"{name}0": {
+            "metadata": {"type": name, "basename": name, "name": name, "id": 0, "paths": {}}
+        }
+    }
+    edges = []
+    for i, package in enumerate(packages, start=1):
+        nodes[f"package{i}"] = {
+            "metadata": {
+                "type": "package",
+                "basename": "package",
+                "name": f"package{i}",
+                "id": i,
+                "uniq_id": i,
+                "attributes": {"name": package},
+            }
+        }
+        edges.append({"source": f"{name}0", "target": f"package{i}", "metadata": {"x": 1}})
+    filename = path / (filename or f"{name}.json")
+    filename.write_text(json.dumps({"graph": {"nodes": nodes, "edges": edges}}))
+    return str(filename)
+
+
+@pytest.fixture
+def files(tmp_path):
+    path = tmp_path / "subsystems"
+    path.mkdir()
+    return [
+        write_subsystem(path, "spack", ["lammps", "hdf5"]),
+        write_subsystem(path, "modules", ["python"]),
+        write_subsystem(path, "containers", ["ubuntu"] * 20),
+    ]
+
+
+@pytest.fixture
+def parallel(monkeypatch):
+    """
+    Parse files in a process pool however small they are.
+    """
+    monkeypatch.setattr(SubsystemRegistry, "parallel_size", 0)
+
+
+def get_contents(registry):
+    return [
+        sorted(registry.query(f"SELECT * FROM {table};"))
+        for table in ["subsystems", "nodes", "attributes"]
+    ]
+
+
+def test_load_files(files, parallel, monkeypatch):
+    """
+    Subsystems come back in order, compacted, and a large file is streamed.
+    """
+    registry = SubsystemRegistry(os.path.dirname(files[0]), workers=2)
+    monkeypatch.setattr(registry, "stream_size", max(os.path.getsize(x) for x in files[:2]))
+    subsystems = list(registry.load_files(files))
+
+    assert [x.name for x in subsystems] == ["spack", "modules", "containers"]
+    assert [x.stream for x in subsystems] == [False, False, True]
+    spack = subsystems[0]
+    assert "paths" not in spack.graph["nodes"]["spack0"]["metadata"]
+    assert "uniq_id" not in spack.graph["nodes"]["package1"]["metadata"]
+    assert spack.graph["edges"] == [
+        {"source": "spack0", "target": "package1"},
+        {"source": "spack0", "target": "package2"},
+    ]
+
+
+def test_same_as_serial(files, parallel):
+    """
+    A registry loaded in parallel has the same contents as one loaded serially.
+    """
+    path = os.path.dirname(files[0])
+    serial = SubsystemRegistry(path, workers=1)
+    registry = SubsystemRegistry(path, workers=2)
+    assert get_contents(registry) == get_contents(serial)
+    assert registry.has_node_attribute("spack", "package", "name", "lammps")
+
+
+def test_duplicate(tmp_path, files, parallel):
+    """
+    A duplicate subsystem is an error, as it is when loaded serially.
+    """
+    write_subsystem(tmp_path / "subsystems", "spack", ["zlib"], filename="spack-again.json")
+    for workers in 1, 2:
+        with pytest.raises(sqlite3.IntegrityError):
+            SubsystemRegistry(str(tmp_path / "subsystems"), workers=workers)